@@ -1,88 +1,863 @@
 import chess
+import os
 import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from engine.bitbase import MAX_PIECES, WIN, LOSS, Bitbases
+from engine.book import OpeningBook
+from engine.evaluator import PIECE_VALUES, evaluate
+from engine.move_ordering import MAX_PLY, MoveOrderer, mvv_lva
+from engine.pawn_hash import PawnHashTable
+from engine.position import Position
+from engine.transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Shared between searches so positions from earlier moves stay useful.
+DEFAULT_HASH_MB = 16
+TRANSPOSITION_TABLE = TranspositionTable(DEFAULT_HASH_MB)
+
+
+def set_hash_size(size_mb):
+    """
+    Resize the shared transposition table used by find_best_move.
+    """
+    TRANSPOSITION_TABLE.resize(size_mb)
+
+# Pawn structure scores, also kept across searches: pawns move rarely, so
+# most entries stay valid for the rest of the game.
+DEFAULT_PAWN_HASH_MB = 1
+PAWN_HASH_TABLE = PawnHashTable(DEFAULT_PAWN_HASH_MB)
+
+# Consulted by find_best_move before searching; empty unless a book file exists.
+OPENING_BOOK = OpeningBook()
+
+
+def set_book_path(path):
+    """
+    Use the Polyglot book at path for find_best_move (None disables the book).
+    """
+    OPENING_BOOK.set_path(path)
+
+# Win/draw/loss tables for small endings, probed inside the search; empty
+# until generate_bitbases.py has written some.
+BITBASES = Bitbases()
+
+
+def set_bitbase_dir(directory):
+    """
+    Probe the bitbases in directory during searches (None disables them).
+    """
+    BITBASES.set_directory(directory)
+
+MAX_DEPTH = 64
+
+# How often (in nodes) the search looks at the clock.
+CHECK_INTERVAL = 1024
+
+# score is in centipawns from White's point of view (see MATE_SCORE for mates).
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'pv', 'stats'])
+
+
+class SearchOptions:
+    """
+    Feature switches for the search, mainly so benchmarks can compare them.
+    null_move, late_move_reductions and futility turn on the selective
+    search in negamax; without them every move is searched to full depth.
+    bitbases lets negamax score small endings from BITBASES.
+    """
+
+    def __init__(self, move_ordering=True, null_move=True, late_move_reductions=True, futility=True,
+                 bitbases=True):
+        self.move_ordering = move_ordering
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.futility = futility
+        self.bitbases = bitbases
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time or node budget runs out, or the
+    search is cancelled through its stop event.
+    """
+
+
+class SearchState:
+    """
+    Bookkeeping for one search, threaded through negamax: the transposition
+    table, node count, limits and the previous iteration's principal variation.
+    statistics is an optional engine.search_stats.SearchStatistics.
+    """
+
+    def __init__(self, tt=None, deadline=None, node_limit=None, options=None, root_ply=0, stop_event=None,
+                 statistics=None):
+        self.tt = tt
+        self.statistics = statistics
+        self.deadline = deadline
+        self.node_limit = node_limit
+        self.stop_event = stop_event
+        self.options = options or SearchOptions()
+        self.orderer = MoveOrderer() if self.options.move_ordering else None
+        self.root_ply = root_ply
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+        self.aspiration_researches = 0
+        self.null_cutoffs = 0
+        self.reductions = 0
+        self.futility_prunes = 0
+        self.bitbase_hits = 0
+        self.pv_moves = {}
+
+    def stats(self):
+        return {
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            'researches': self.researches,
+            'aspiration_researches': self.aspiration_researches,
+            'null_cutoffs': self.null_cutoffs,
+            'reductions': self.reductions,
+            'futility_prunes': self.futility_prunes,
+            'bitbase_hits': self.bitbase_hits,
+        }
+
+    def check_limits(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchTimeout()
+
+# Quiescence skips captures that cannot lift the score to alpha even with this
+# many centipawns to spare.
+DELTA_MARGIN = 200
+
+# Checkmate scores are MATE_SCORE minus the distance to mate in plies, so the
+# search prefers the quickest mate; any score beyond MATE_BOUND is a mate.
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+
+# Iterative deepening searches the root inside this window around the
+# previous iteration's score, doubling it on the side that fails.
+ASPIRATION_WINDOW = 50
+ASPIRATION_MIN_DEPTH = 3
+
+# Null-move pruning: skip a turn and search this many plies shallower.
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# Late-move reductions: quiet moves after the first LMR_MIN_MOVES are
+# searched one ply shallower first, and again at full depth if they beat alpha.
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3
+
+# Futility pruning: margin by remaining depth; quiet moves are skipped when
+# the static evaluation plus the margin still cannot reach alpha.
+FUTILITY_MARGINS = (0, 200, 500)
+
+# A bitbase win scores this plus the static evaluation, so the search still
+# makes progress towards mate (the tables know the result, not the distance)
+# and a real mate found by the search still scores higher.
+BITBASE_WIN = 20000
 
 def evaluate_board(board):
     """
-    Evaluate the board state and return a score.
+    Evaluate the board state and return a score in centipawns.
     Positive score favors White, negative score favors Black.
+    Material and piece-square terms are maintained incrementally by
+    engine.position.Position and pawn structure is cached in
+    PAWN_HASH_TABLE; see engine.evaluator.
     """
-    piece_values = {
-        chess.PAWN: 1,
-        chess.KNIGHT: 3,
-        chess.BISHOP: 3,
-        chess.ROOK: 5,
-        chess.QUEEN: 9,
-        chess.KING: 0  # King has no material value
-    }
-
-    score = 0
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            value = piece_values[piece.piece_type]
-            if piece.color == chess.WHITE:
-                score += value
-            else:
-                score -= value
+    return evaluate(board, PAWN_HASH_TABLE)
+
+def mate_in(score):
+    """
+    Full moves to mate for a mate score, negative when the side the score is
+    for is the one being mated; None for an ordinary score.
+    """
+    if abs(score) < MATE_BOUND:
+        return None
+    moves = (MATE_SCORE - abs(score) + 1) // 2
+    return moves if score > 0 else -moves
+
+def score_to_tt(score, ply):
+    """
+    Mate scores are stored relative to the node rather than the root, so an
+    entry stays valid when the position is reached at another ply.
+    """
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
     return score
 
-def minimax(board, depth, alpha, beta, is_maximizing):
+def has_non_pawn_material(board):
     """
-    Minimax algorithm with Alpha-Beta Pruning.
+    Whether the side to move has a piece other than king and pawns. Without
+    one, zugzwang is common and a null move proves nothing.
     """
-    if depth == 0 or board.is_game_over():
-        return evaluate_board(board)
+    return bool(board.occupied_co[board.turn] & ~(board.pawns | board.kings))
+
+def negamax(board, depth, alpha, beta, state=None):
+    """
+    Alpha-beta search in negamax form with principal variation search.
+    Scores are from the side to move's point of view. The first (expected
+    best) move is searched with the full window, the others with a null
+    window that only proves they are no better than alpha; a move that fails
+    high is re-searched with the full window.
+    Outside the principal variation, the state's options enable null-move
+    pruning, late-move reductions and futility pruning, and below the root
+    positions found in BITBASES are scored from the table without searching.
+    With a SearchState whose tt is set, board must be an engine.position.Position
+    so its Zobrist key is available.
+    Raises SearchTimeout when the state's budget runs out.
+    """
+    tt = None
+    root_ply = 0
+    if state is not None:
+        state.nodes += 1
+        if not state.nodes % CHECK_INTERVAL:
+            state.check_limits()
+        tt = state.tt
+        root_ply = state.root_ply
+    ply = len(board.move_stack) - root_ply
+    if state is not None and state.statistics is not None:
+        state.statistics.nodes_by_ply[ply] += 1
+
+    # Checked before quiescence so mates and stalemates at the horizon are
+    # scored as such, not by the static evaluation.
+    outcome = board.outcome()
+    if outcome is not None:
+        # The side to move has been mated, or the game is drawn.
+        return 0 if outcome.winner is None else -MATE_SCORE + ply
+    if depth == 0:
+        return quiescence(board, alpha, beta, state)
+
+    if (ply > 0 and state is not None and state.options.bitbases
+            and chess.popcount(board.occupied) <= MAX_PIECES):
+        result = BITBASES.probe(board)
+        if result is not None:
+            state.bitbase_hits += 1
+            if result == WIN or result == LOSS:
+                score = evaluate_board(board)
+                score = score if board.turn == chess.WHITE else -score
+                return BITBASE_WIN + score if result == WIN else -BITBASE_WIN + score
+            return 0
+
+    alpha_orig, beta_orig = alpha, beta
+    hash_move = None
+    if tt is not None:
+        entry = tt.probe(board.zobrist)
+        if entry is not None:
+            hash_move = entry[3]
+            if entry[0] >= depth:
+                flag = entry[1]
+                score = score_from_tt(entry[2], ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                elif flag == UPPER:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+
+    in_check = board.is_check()
+    futile = False
+    reduce = False
+    if state is not None and beta_orig - alpha_orig == 1 and not in_check:
+        options = state.options
+        static_eval = evaluate_board(board)
+        if board.turn == chess.BLACK:
+            static_eval = -static_eval
+
+        # Null move: if passing still scores at least beta, a real move would
+        # too. Never two null moves in a row, and not in pawn endings.
+        if (options.null_move and depth >= NULL_MOVE_MIN_DEPTH and static_eval >= beta
+                and (not board.move_stack or board.move_stack[-1]) and has_non_pawn_material(board)):
+            board.push(chess.Move.null())
+            score = -negamax(board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, state)
+            board.pop()
+            if score >= beta:
+                state.null_cutoffs += 1
+                # A mate found after passing is not a proven mate.
+                return beta if score >= MATE_BOUND else score
+
+        futile = (options.futility and depth < len(FUTILITY_MARGINS) and alpha > -MATE_BOUND
+                  and static_eval + FUTILITY_MARGINS[depth] <= alpha)
+        reduce = options.late_move_reductions and depth >= LMR_MIN_DEPTH
 
     legal_moves = list(board.legal_moves)
+    orderer = None
+    killers = ()
+    if state is not None:
+        # Search the previous iteration's line first, then the hash move.
+        # Only iterative_deepening fills pv_moves, and it searches a Position.
+        if state.pv_moves:
+            hash_move = state.pv_moves.get(board.zobrist, hash_move)
+        orderer = state.orderer
+        if orderer is not None:
+            legal_moves = orderer.order(board, legal_moves, ply, hash_move)
+            if ply < MAX_PLY:
+                killers = orderer.killers[ply]
+        elif hash_move in legal_moves:
+            legal_moves.remove(hash_move)
+            legal_moves.insert(0, hash_move)
+
+    best_move = None
+    best_score = -INFINITY
+    for index, move in enumerate(legal_moves):
+        # Quiet, non-checking moves late in the list are the ones selective
+        # search prunes or reduces.
+        late_quiet = (index > 0 and (futile or reduce and index >= LMR_MIN_MOVES)
+                      and not move.promotion and not board.is_capture(move)
+                      and move not in killers and not board.gives_check(move))
+        if futile and late_quiet:
+            state.futility_prunes += 1
+            best_score = max(best_score, static_eval + FUTILITY_MARGINS[depth])
+            continue
+
+        board.push(move)
+        if index == 0:
+            score = -negamax(board, depth - 1, -beta, -alpha, state)
+        else:
+            score = None
+            if late_quiet:
+                state.reductions += 1
+                score = -negamax(board, depth - 2, -alpha - 1, -alpha, state)
+            if score is None or score > alpha:
+                score = -negamax(board, depth - 1, -alpha - 1, -alpha, state)
+                if alpha < score < beta:
+                    if state is not None:
+                        state.researches += 1
+                    score = -negamax(board, depth - 1, -beta, -alpha, state)
+        board.pop()
+        if score > best_score:
+            best_score = score
+            best_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    if state is not None:
+                        _record_cutoff(state, orderer, board, move, ply, depth, index)
+                    break
+
+    if tt is not None:
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(board.zobrist, depth, flag, score_to_tt(best_score, ply), best_move)
+    return best_score
+
+def minimax(board, depth, alpha, beta, is_maximizing, state=None):
+    """
+    Minimax interface to negamax, with scores from White's point of view:
+    maximizing for White, minimizing for Black. is_maximizing must match the
+    side to move.
+    """
     if is_maximizing:
-        max_eval = float('-inf')
-        for move in legal_moves:
-            board.push(move)
-            eval = minimax(board, depth - 1, alpha, beta, False)
-            board.pop()
-            max_eval = max(max_eval, eval)
-            alpha = max(alpha, eval)
-            if beta <= alpha:
-                break
-        return max_eval
+        return negamax(board, depth, alpha, beta, state)
+    return -negamax(board, depth, -beta, -alpha, state)
+
+def noisy_moves(board):
+    """
+    Legal captures and queen promotions, most valuable victim first.
+    """
+    moves = list(board.generate_legal_captures())
+    promotion_mask = chess.BB_RANK_8 if board.turn == chess.WHITE else chess.BB_RANK_1
+    for move in board.generate_legal_moves(board.pawns, promotion_mask & ~board.occupied):
+        if move.promotion == chess.QUEEN:
+            moves.append(move)
+    moves.sort(key=lambda move: mvv_lva(board, move), reverse=True)
+    return moves
+
+def capture_gain(board, move):
+    """
+    Material a capture or promotion wins, ignoring any recapture.
+    """
+    victim = board.piece_type_at(move.to_square)
+    gain = PIECE_VALUES[victim] if victim else 0
+    if board.is_en_passant(move):
+        gain = PIECE_VALUES[chess.PAWN]
+    if move.promotion:
+        gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+    return gain
+
+def quiescence(board, alpha, beta, state=None):
+    """
+    Search only captures and promotions until the position is quiet, so the
+    static evaluation is never taken in the middle of an exchange.
+    The side to move may stand pat on the static evaluation unless it is in
+    check; then every evasion is searched, and having none is mate.
+    Scores are from the side to move's point of view, as in negamax.
+    """
+    if state is not None:
+        state.nodes += 1
+        state.qnodes += 1
+        if not state.nodes % CHECK_INTERVAL:
+            state.check_limits()
+
+    in_check = board.is_check()
+    if in_check:
+        moves = sorted(board.legal_moves, key=lambda move: mvv_lva(board, move), reverse=True)
+        if not moves:
+            root_ply = state.root_ply if state is not None else 0
+            return -MATE_SCORE + len(board.move_stack) - root_ply
+        best_score = -INFINITY
     else:
-        min_eval = float('inf')
-        for move in legal_moves:
-            board.push(move)
-            eval = minimax(board, depth - 1, alpha, beta, True)
-            board.pop()
-            min_eval = min(min_eval, eval)
-            beta = min(beta, eval)
-            if beta <= alpha:
-                break
-        return min_eval
+        stand_pat = evaluate_board(board)
+        if board.turn == chess.BLACK:
+            stand_pat = -stand_pat
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        best_score = stand_pat
+        moves = noisy_moves(board)
+    for move in moves:
+        # Delta pruning: even winning this piece for free cannot reach alpha.
+        # The skipped capture's optimistic bound still caps a fail-low, so
+        # the returned upper bound does not depend on the window.
+        if not in_check:
+            optimistic = stand_pat + capture_gain(board, move) + DELTA_MARGIN
+            if optimistic <= alpha:
+                best_score = max(best_score, optimistic)
+                continue
+        board.push(move)
+        score = -quiescence(board, -beta, -alpha, state)
+        board.pop()
+        if score > best_score:
+            best_score = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+    return best_score
+
+def _record_cutoff(state, orderer, board, move, ply, depth, index):
+    """
+    Count a beta cutoff and feed quiet cutoff moves to the killer/history tables.
+    """
+    state.cutoffs += 1
+    if index == 0:
+        state.first_move_cutoffs += 1
+    if state.statistics is not None:
+        state.statistics.cutoffs_by_index[index] += 1
+    if orderer is not None and orderer.is_quiet(board, move):
+        orderer.record_cutoff(board, move, ply, depth)
 
-def find_best_move(board, depth):
+def search_root(board, depth, root_moves, state, alpha=-INFINITY, beta=INFINITY):
     """
-    Find the best move for the current player using Minimax.
+    Search the root moves to the given depth inside the window (alpha, beta),
+    using the same principal variation search as negamax.
+    Returns (best_move, best_score) from the side to move's point of view. A
+    score <= alpha or >= beta is only a bound, and the caller should widen the
+    window and search again. The best move is moved to the front of root_moves
+    so the next search tries it first.
     """
+    alpha_orig = alpha
     best_move = None
-    best_value = float('-inf') if board.turn == chess.WHITE else float('inf')
+    best_score = -INFINITY
 
-    for move in board.legal_moves:
+    for index, move in enumerate(root_moves):
         board.push(move)
-        board_value = minimax(board, depth - 1, float('-inf'), float('inf'), not board.turn)
+        if index == 0:
+            score = -negamax(board, depth - 1, -beta, -alpha, state)
+        else:
+            score = -negamax(board, depth - 1, -alpha - 1, -alpha, state)
+            if alpha < score < beta:
+                state.researches += 1
+                score = -negamax(board, depth - 1, -beta, -alpha, state)
+        board.pop()
+        if score > best_score:
+            best_score = score
+            best_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+    if best_move is not None:
+        root_moves.remove(best_move)
+        root_moves.insert(0, best_move)
+        if state.tt is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            state.tt.store(board.zobrist, depth, flag, score_to_tt(best_score, 0), best_move)
+    return best_move, best_score
+
+def aspiration_search(board, depth, root_moves, state, guess=None):
+    """
+    Search the root inside a narrow window around guess, the previous
+    iteration's score. When the result falls outside it, the failing side of
+    the window is widened (doubling each time) and the root searched again.
+    """
+    if guess is None or depth < ASPIRATION_MIN_DEPTH or abs(guess) >= MATE_BOUND:
+        return search_root(board, depth, root_moves, state)
+
+    delta = ASPIRATION_WINDOW
+    alpha, beta = guess - delta, guess + delta
+    while True:
+        best_move, score = search_root(board, depth, root_moves, state, alpha, beta)
+        if score <= alpha:
+            alpha = max(score - delta, -INFINITY)
+        elif score >= beta:
+            beta = min(score + delta, INFINITY)
+        else:
+            return best_move, score
+        state.aspiration_researches += 1
+        delta *= 2
+
+def extract_pv(board, tt, depth):
+    """
+    Follow best moves stored in the transposition table from the current position.
+    These probes are not part of the search, so they are left out of the
+    table's hit and miss counters.
+    """
+    hits, misses = tt.hits, tt.misses
+    pv = []
+    seen = set()
+    while len(pv) < depth and board.zobrist not in seen:
+        seen.add(board.zobrist)
+        entry = tt.probe(board.zobrist)
+        if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+            break
+        pv.append(entry[3])
+        board.push(entry[3])
+    for _ in pv:
         board.pop()
+    tt.hits, tt.misses = hits, misses
+    return pv
+
+def iterative_deepening(board, max_depth=MAX_DEPTH, time_limit=None, node_limit=None, tt=None, options=None,
+                        root_moves=None, callback=None, stop_event=None, statistics=None, time_manager=None):
+    """
+    Search depth 1, 2, 3... until max_depth is reached or the time (seconds) or
+    node budget runs out. Each iteration searches the previous best line first.
+    root_moves restricts the search to some of the legal moves; callback, if
+    given, is called with the SearchResult of every completed iteration.
+    Setting stop_event (a threading.Event) from another thread ends the search
+    within CHECK_INTERVAL nodes.
+    statistics, an engine.search_stats.SearchStatistics, collects per-iteration
+    and per-ply details when given.
+    time_manager, an engine.time_manager.TimeManager, replaces time_limit: its
+    hard budget is the deadline and it decides after each iteration whether
+    to go deeper.
+    Returns a SearchResult for the last fully completed iteration.
+    """
+    if tt is None:
+        tt = TRANSPOSITION_TABLE
+    tt.new_search()
+    board = Position.from_board(board)
+
+    start = time.monotonic()
+    deadline = start + time_limit if time_limit is not None else None
+    if time_manager is not None:
+        time_manager.start()
+        deadline = time_manager.deadline() if deadline is None else min(deadline, time_manager.deadline())
+    state = SearchState(tt, deadline, node_limit, options, len(board.move_stack), stop_event, statistics)
+    if statistics is not None:
+        statistics.begin(tt)
 
-        if board.turn == chess.WHITE:
-            if board_value > best_value:
-                best_value = board_value
-                best_move = move
+    legal_moves = list(board.legal_moves)
+    if root_moves is not None:
+        legal_moves = [move for move in legal_moves if move in root_moves]
+    root_moves = legal_moves
+    if state.orderer is not None:
+        root_moves = state.orderer.order(board, root_moves, 0)
+    if not root_moves:
+        outcome = board.outcome()
+        if outcome is None:
+            score = evaluate_board(board)
+        elif outcome.winner is None:
+            score = 0
         else:
-            if board_value < best_value:
-                best_value = board_value
-                best_move = move
+            score = MATE_SCORE if outcome.winner == chess.WHITE else -MATE_SCORE
+        return SearchResult(None, score, 0, 0, [], state.stats())
+    result = SearchResult(root_moves[0], None, 0, 0, [root_moves[0]], state.stats())
+    if time_manager is not None:
+        # With one legal reply, one iteration (for a score and PV) is enough.
+        time_manager.single_reply = len(root_moves) == 1
+
+    score = None
+    for depth in range(1, max_depth + 1):
+        try:
+            best_move, score = aspiration_search(board, depth, root_moves, state, score)
+        except SearchTimeout:
+            break
+
+        pv = extract_pv(board, tt, depth)
+        if not pv or pv[0] != best_move:
+            pv = [best_move]
+        white_score = score if board.turn == chess.WHITE else -score
+        result = SearchResult(best_move, white_score, depth, state.nodes, pv, state.stats())
+        if statistics is not None:
+            statistics.record_iteration(depth, state, white_score, best_move)
+        if callback is not None:
+            callback(result)
+
+        # Remember the line so inner nodes of the next iteration try it first
+        # (search_root has already moved the best root move to the front).
+        state.pv_moves = {}
+        for move in pv:
+            state.pv_moves[board.zobrist] = move
+            board.push(move)
+        for _ in pv:
+            board.pop()
+
+        if time_manager is not None:
+            time_manager.update(score, best_move)
+            if time_manager.should_stop():
+                break
+
+        # A deeper iteration costs several times the last one; don't start
+        # it when there is clearly no time left to finish.
+        if time_limit is not None and time.monotonic() - start > time_limit / 2:
+            break
+
+    return result
+
+# Worker processes are kept between searches so their transposition tables stay warm.
+_pool = None
+_pool_workers = 0
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+def _search_root_subset(root_fen, moves, root_moves, max_depth, time_limit, node_limit, clear_table=False):
+    """
+    Worker entry point: search only root_moves (UCI strings) of the position
+    reached by playing moves from root_fen, first emptying the worker's
+    transposition table if clear_table is set. Returns ([(depth, move, score, nodes)], nodes).
+    """
+    if clear_table:
+        TRANSPOSITION_TABLE.clear()
+    board = chess.Board(root_fen)
+    for uci in moves:
+        board.push_uci(uci)
+    iterations = []
+    result = iterative_deepening(
+        board, max_depth, time_limit, node_limit,
+        root_moves=[chess.Move.from_uci(uci) for uci in root_moves],
+        callback=lambda r: iterations.append((r.depth, r.move.uci(), r.score, r.nodes)))
+    return iterations, result.nodes
+
+def parallel_search(board, max_depth=MAX_DEPTH, workers=None, time_limit=None, node_limit=None, clear_tables=False):
+    """
+    Root-split parallel search: the root moves are dealt out round-robin to a
+    pool of worker processes, each running its own iterative deepening with its
+    own transposition table. The answer comes from the deepest iteration that
+    every worker completed, so it does not depend on which worker finished first.
+    Falls back to a single-process search when there is nothing to split or
+    processes are unavailable.
+    The workers' tables persist between calls; clear_tables empties them
+    first (and the shared table for a single-process fallback), so
+    benchmarks do not depend on what was searched before.
+    Returns a SearchResult (pv holds only the best move).
+    """
+    workers = workers or os.cpu_count() or 1
+    root_moves = list(board.legal_moves)
+    if workers <= 1 or len(root_moves) <= 1:
+        if clear_tables:
+            TRANSPOSITION_TABLE.clear()
+        return iterative_deepening(board, max_depth, time_limit, node_limit)
+
+    # Deal moves best-first so every worker gets a share of the likely candidates.
+    # The pool keeps its configured size (resizing it would restart the
+    # workers and lose their tables); with fewer root moves than workers,
+    # only some of them get a group.
+    root_moves = MoveOrderer().order(board, root_moves, 0)
+    group_count = min(workers, len(root_moves))
+    groups = [[move.uci() for move in root_moves[i::group_count]] for i in range(group_count)]
+    root_fen = board.root().fen()
+    moves = [move.uci() for move in board.move_stack]
+    worker_nodes = node_limit // group_count if node_limit is not None else None
+
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_search_root_subset, root_fen, moves, group, max_depth, time_limit, worker_nodes,
+                               clear_tables)
+                   for group in groups]
+        outputs = [future.result() for future in futures]
+    except (OSError, BrokenProcessPool, NotImplementedError):
+        return iterative_deepening(board, max_depth, time_limit, node_limit)
+
+    completed = [iterations for iterations, _ in outputs if iterations]
+    nodes = sum(worker_nodes for _, worker_nodes in outputs)
+    if len(completed) < len(outputs):
+        # Some worker could not finish even depth 1; fall back to the first move dealt.
+        return SearchResult(root_moves[0], None, 0, nodes, [root_moves[0]], {'nodes': nodes})
+
+    depth = min(iterations[-1][0] for iterations in completed)
+    candidates = [iterations[depth - 1] for iterations in completed]
+    is_white = board.turn == chess.WHITE
+    _, move, score, _ = max(candidates, key=lambda c: c[2]) if is_white else min(candidates, key=lambda c: c[2])
+    move = chess.Move.from_uci(move)
+    return SearchResult(move, score, depth, nodes, [move], {'nodes': nodes})
+
+def find_best_move(board, depth=MAX_DEPTH, tt=None, time_limit=None, node_limit=None, options=None, workers=1,
+                   stop_event=None, use_book=True, statistics=None, time_manager=None):
+    """
+    Find the best move for the current player with an alpha-beta (PVS) search.
+    A move from the opening book is returned at once if use_book is set and
+    the position is in the book.
+    Searches iteratively up to depth, stopping early if time_limit (seconds)
+    or node_limit is given and runs out.
+    Uses the shared transposition table unless another one is passed in.
+    With workers > 1 the root moves are searched in parallel processes
+    (see parallel_search); workers=None uses every CPU.
+    stop_event cancels a single-process search early, statistics collects
+    its details and time_manager budgets it from a clock (see
+    iterative_deepening). Parallel searches use the manager's soft budget as
+    a fixed time limit.
+    """
+    if use_book:
+        book_move = OPENING_BOOK.move(board)
+        if book_move is not None:
+            return book_move
+    if workers != 1:
+        if time_limit is None and time_manager is not None:
+            time_limit = time_manager.soft
+        return parallel_search(board, depth, workers, time_limit, node_limit).move
+    return iterative_deepening(board, depth, time_limit, node_limit, tt, options, stop_event=stop_event,
+                               statistics=statistics, time_manager=time_manager).move
+
+def expected_reply(board, tt=None):
+    """
+    The reply the last search expects from the side to move, read from the
+    transposition table, or None if it has no legal suggestion.
+    """
+    if tt is None:
+        tt = TRANSPOSITION_TABLE
+    entry = tt.probe(Position.from_board(board).zobrist)
+    if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+        return None
+    return entry[3]
+
+class Ponderer:
+    """
+    Searches on the opponent's time. After our move, start() searches the
+    position after the reply we expect; when the opponent actually moves,
+    hit() tells whether they played it. On a hit the running search simply
+    carries on (its iterations and table entries are already done) and is
+    stopped once the move's time budget is used up; on a miss it is dropped.
+    The methods may be called from different threads (a GUI's event loop and
+    its worker thread): the fields are only read and changed under lock, and
+    threads are joined outside it.
+    """
+
+    def __init__(self, tt=None):
+        self.tt = tt
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = None
+        self.timer = None
+        self.expected_move = None
+        self.result = None
+
+    def start(self, board, expected_move, max_depth=MAX_DEPTH):
+        """
+        Begin pondering board (opponent to move) assuming they play expected_move.
+        """
+        self.stop()
+        ponder_board = board.copy()
+        ponder_board.push(expected_move)
+        with self.lock:
+            self.expected_move = expected_move
+            self.result = None
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(
+                target=self._search, args=(ponder_board, max_depth, self.stop_event), daemon=True)
+            self.thread.start()
+
+    def _search(self, board, max_depth, stop_event):
+        result = iterative_deepening(board, max_depth, tt=self.tt, stop_event=stop_event)
+        with self.lock:
+            if stop_event is self.stop_event:
+                self.result = result
+
+    def hit(self, move, time_limit):
+        """
+        Report the opponent's move. Returns True on a ponder-hit, in which case
+        the search is given time_limit more seconds and wait() returns its move;
+        otherwise the ponder search is stopped and False is returned.
+        """
+        with self.lock:
+            hit = self.thread is not None and move == self.expected_move
+            if hit:
+                self.timer = threading.Timer(time_limit, self.stop_event.set)
+                self.timer.daemon = True
+                self.timer.start()
+        if not hit:
+            self.stop()
+        return hit
+
+    def wait(self):
+        """
+        Wait for the ponder search to finish and return its best move (None
+        if it was stopped or replaced meanwhile).
+        """
+        with self.lock:
+            thread, timer, stop_event = self.thread, self.timer, self.stop_event
+        if thread is not None:
+            thread.join()
+        if timer is not None:
+            timer.cancel()
+        with self.lock:
+            if stop_event is not self.stop_event:
+                return None
+            if self.thread is thread:
+                self.thread = None
+                self.timer = None
+            result = self.result
+        return result.move if result else None
 
-    return best_move
+    def stop(self):
+        """
+        Abandon the ponder search, if any.
+        """
+        with self.lock:
+            stop_event = self.stop_event
+            if stop_event is not None:
+                stop_event.set()
+        self.wait()
+        with self.lock:
+            if stop_event is self.stop_event:
+                self.stop_event = None
+                self.expected_move = None
+                self.result = None
 
 def find_random_move(board):
     """
     Find a random legal move for the AI.
     """
     legal_moves = list(board.legal_moves)
-    return random.choice(legal_moves) if legal_moves else None
\ No newline at end of file
+    return random.choice(legal_moves) if legal_moves else None
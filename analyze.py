@@ -0,0 +1,223 @@
+"""
+Offline analysis: stream positions from PGN or EPD files, search each one
+with the engine on a pool of worker processes, and append one JSON line per
+position to the output file.
+
+Usage:
+    python analyze.py games.pgn -o games.jsonl --depth 4
+    python analyze.py suite.epd more.pgn -o out.jsonl --time 1 --workers 8
+
+Positions are read lazily (one PGN game or EPD line at a time) and only a
+few per worker are in flight, so memory use does not grow with the input.
+Results are written in input order. A checkpoint next to the output file
+(<output>.checkpoint) records how many positions are done; rerunning the
+same command after an interruption continues from there.
+
+Each output line holds: id, fen, move, score (centipawns, White's point of
+view), mate (moves to mate from White's point of view, or null), depth,
+nodes, seconds and pv.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import chess
+import chess.pgn
+import ai
+
+# Positions queued per worker, enough to keep every worker busy.
+IN_FLIGHT_PER_WORKER = 4
+
+# Results written between checkpoints.
+DEFAULT_CHECKPOINT_EVERY = 50
+
+
+def iter_epd_positions(path):
+    """
+    Yield (id, fen) for every EPD record in path. The id is the record's
+    `id` operation if it has one, else path:line.
+    """
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                board, operations = chess.Board.from_epd(line)
+            except ValueError as error:
+                print(f"{path}:{line_number}: skipping invalid EPD ({error})", file=sys.stderr)
+                continue
+            if not board.is_valid():
+                print(f"{path}:{line_number}: skipping illegal position", file=sys.stderr)
+                continue
+            yield str(operations.get("id", f"{path}:{line_number}")), board.fen()
+
+
+def iter_pgn_positions(path, min_ply=0):
+    """
+    Yield (id, fen) for every position of every game in path, from ply
+    min_ply on. Games are read one at a time; the id is path:game:ply.
+    """
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        game_number = 0
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                break
+            game_number += 1
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                if ply >= min_ply:
+                    yield f"{path}:{game_number}:{ply}", board.fen()
+                board.push(move)
+            if board.ply() >= min_ply and not board.is_game_over():
+                yield f"{path}:{game_number}:{board.ply()}", board.fen()
+
+
+def iter_positions(paths, min_ply=0):
+    """
+    Chain the positions of all input files, choosing the reader by extension.
+    """
+    for path in paths:
+        if path.lower().endswith(".pgn"):
+            yield from iter_pgn_positions(path, min_ply)
+        else:
+            yield from iter_epd_positions(path)
+
+
+def analyze_position(position_id, fen, depth, time_limit):
+    """
+    Worker entry point: search one position and return its result record.
+    """
+    board = chess.Board(fen)
+    start = time.monotonic()
+    result = ai.iterative_deepening(board, depth, time_limit)
+    score = result.score
+    return {
+        "id": position_id,
+        "fen": fen,
+        "move": result.move.uci() if result.move else None,
+        "score": score,
+        "mate": ai.mate_in(score) if score is not None else None,
+        "depth": result.depth,
+        "nodes": result.nodes,
+        "seconds": round(time.monotonic() - start, 3),
+        "pv": [move.uci() for move in result.pv],
+    }
+
+
+def analyze_in_order(positions, depth, time_limit, workers):
+    """
+    Yield result records in the same order as positions, searching up to
+    workers positions at once and reading ahead only a little.
+    """
+    if workers <= 1:
+        for position_id, fen in positions:
+            yield analyze_position(position_id, fen, depth, time_limit)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for position_id, fen in positions:
+            pending.append(pool.submit(analyze_position, position_id, fen, depth, time_limit))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def checkpoint_path(output):
+    return output + ".checkpoint"
+
+
+def load_checkpoint(output, settings):
+    """
+    Return (done, offset) to resume from, or (0, 0) for a fresh run.
+    Exits if the checkpoint belongs to a run with different settings.
+    """
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path, encoding="utf-8") as handle:
+        checkpoint = json.load(handle)
+    if checkpoint.get("settings") != settings:
+        sys.exit(f"{path} was written by a run with different inputs or settings; "
+                 f"use --restart to start over")
+    return checkpoint["done"], checkpoint["offset"]
+
+
+def save_checkpoint(output, settings, done, offset):
+    """
+    Record progress atomically: the checkpoint is replaced, never half-written.
+    """
+    path = checkpoint_path(output)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump({"settings": settings, "done": done, "offset": offset}, handle)
+    os.replace(temporary, path)
+
+
+def run(paths, output, depth, time_limit, workers, min_ply=0, checkpoint_every=DEFAULT_CHECKPOINT_EVERY,
+        restart=False):
+    """
+    Analyze every position in paths into output, resuming from the
+    checkpoint unless restart is set. Returns the number of positions
+    analyzed by this run.
+    """
+    settings = {"inputs": [os.path.abspath(path) for path in paths], "depth": depth,
+                "time": time_limit, "min_ply": min_ply}
+    done, offset = (0, 0) if restart else load_checkpoint(output, settings)
+    if done:
+        print(f"resuming after {done} positions", file=sys.stderr)
+
+    analyzed = 0
+    start = time.monotonic()
+    with open(output, "a+b") as handle:
+        # Drop anything written after the last checkpoint; it is redone below.
+        handle.truncate(offset)
+        handle.seek(offset)
+        positions = islice(iter_positions(paths, min_ply), done, None)
+        try:
+            for record in analyze_in_order(positions, depth, time_limit, workers):
+                handle.write((json.dumps(record) + "\n").encode("utf-8"))
+                analyzed += 1
+                if analyzed % checkpoint_every == 0:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                    save_checkpoint(output, settings, done + analyzed, handle.tell())
+                    rate = analyzed / (time.monotonic() - start)
+                    print(f"{done + analyzed} positions ({rate:.1f}/s)", file=sys.stderr)
+        finally:
+            handle.flush()
+            os.fsync(handle.fileno())
+            save_checkpoint(output, settings, done + analyzed, handle.tell())
+    return analyzed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze positions from PGN/EPD files to JSONL.")
+    parser.add_argument("inputs", nargs="+", help=".pgn files (every position) or EPD files")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write")
+    parser.add_argument("--depth", type=int, default=4, help="search depth per position")
+    parser.add_argument("--time", type=float, help="seconds per position (stops before --depth if reached)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-ply", type=int, default=0, help="skip PGN positions before this ply")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    try:
+        analyzed = run(args.inputs, args.output, args.depth, args.time, args.workers, args.min_ply,
+                       args.checkpoint_every, args.restart)
+    except KeyboardInterrupt:
+        sys.exit("interrupted; rerun the same command to resume")
+    print(f"analyzed {analyzed} positions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import argparse
+import os
+import time
+import chess
+from ai import PAWN_HASH_TABLE, SearchOptions, iterative_deepening, parallel_search
+from engine import batch_eval
+from engine.evaluator import evaluate
+from engine.search_stats import SearchStatistics, StackSampler, format_breakdown, profile_breakdown, profile_call
+from engine.transposition import TranspositionTable
+
+# Middlegame-heavy set; the start position alone hides most ordering effects.
+BENCH_POSITIONS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "2r2rk1/1b2qppp/p3pn2/1p6/3P4/P1NB1Q2/1P3PPP/2R2RK1 w - - 0 18",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def run_search_bench(depth, options, hash_mb=16, positions=BENCH_POSITIONS):
+    """
+    Search every position to a fixed depth with a fresh table.
+    Returns a list of per-position result dicts.
+    """
+    results = []
+    for fen in positions:
+        tt = TranspositionTable(hash_mb)
+        start = time.perf_counter()
+        result = iterative_deepening(chess.Board(fen), depth, tt=tt, options=options)
+        elapsed = time.perf_counter() - start
+        row = dict(result.stats)
+        row.update(fen=fen, move=result.move.uci() if result.move else None,
+                   score=result.score, seconds=elapsed, nps=result.nodes / elapsed if elapsed else 0.0)
+        results.append(row)
+    return results
+
+
+def print_search_bench(label, results):
+    print(f"== {label}")
+    print(f"{'nodes':>10} {'cutoffs':>9} {'1st-cut%':>8} {'sec':>7} {'nps':>8}  move   fen")
+    for row in results:
+        print(f"{row['nodes']:>10} {row['cutoffs']:>9} {100 * row['first_move_cutoff_rate']:>7.1f}% "
+              f"{row['seconds']:>7.2f} {row['nps']:>8.0f}  {row['move'] or '-':6} {row['fen']}")
+    nodes = sum(row['nodes'] for row in results)
+    seconds = sum(row['seconds'] for row in results)
+    print(f"total: {nodes} nodes in {seconds:.2f}s ({nodes / seconds if seconds else 0:.0f} nps)")
+
+
+# Selective search configurations compared by the "selective" benchmark.
+SELECTIVE_CONFIGS = [
+    ("none", SearchOptions(null_move=False, late_move_reductions=False, futility=False)),
+    ("null move", SearchOptions(late_move_reductions=False, futility=False)),
+    ("lmr", SearchOptions(null_move=False, futility=False)),
+    ("futility", SearchOptions(null_move=False, late_move_reductions=False)),
+    ("all", SearchOptions()),
+]
+
+
+def run_selective_bench(time_limit, configs=SELECTIVE_CONFIGS, hash_mb=16, positions=BENCH_POSITIONS):
+    """
+    Give every position the same time budget under each configuration and
+    record the depth the search completed.
+    Returns a list of (label, [depth per position], nodes, seconds).
+    """
+    rows = []
+    for label, options in configs:
+        depths = []
+        nodes = 0
+        start = time.perf_counter()
+        for fen in positions:
+            result = iterative_deepening(chess.Board(fen), time_limit=time_limit,
+                                         tt=TranspositionTable(hash_mb), options=options)
+            depths.append(result.depth)
+            nodes += result.nodes
+        rows.append((label, depths, nodes, time.perf_counter() - start))
+    return rows
+
+
+def print_selective_bench(time_limit, rows):
+    print(f"== depth reached in {time_limit:g}s per position")
+    print(f"{'config':10} {'mean':>5} {'depth/s':>8} {'nodes':>10}  depths")
+    for label, depths, nodes, seconds in rows:
+        mean = sum(depths) / len(depths)
+        print(f"{label:10} {mean:>5.2f} {sum(depths) / seconds:>8.2f} {nodes:>10}  {' '.join(map(str, depths))}")
+
+
+def run_profile(fen, depth, time_limit=None, hash_mb=16, cprofile_path=None, folded_path=None, stats_path=None):
+    """
+    Search one position with statistics on, under cProfile (and the stack
+    sampler if folded_path is set), and print where the time went.
+    """
+    statistics = SearchStatistics()
+    PAWN_HASH_TABLE.reset_stats()
+    sampler = StackSampler() if folded_path else None
+    if sampler is not None:
+        sampler.start()
+    try:
+        result, profile = profile_call(iterative_deepening, chess.Board(fen), depth, time_limit,
+                                       tt=TranspositionTable(hash_mb), statistics=statistics)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+
+    print(f"== {fen}")
+    print(statistics.format())
+    print(f"best move {result.move.uci() if result.move else '-'}, {result.nodes} nodes")
+    pawns = PAWN_HASH_TABLE.stats()
+    print(f"pawn hash: {100 * pawns['hit_rate']:.1f}% hits, {pawns['collisions']} collisions")
+    print("== time by category (cProfile self time)")
+    print(format_breakdown(profile_breakdown(profile)))
+    if cprofile_path:
+        profile.dump_stats(cprofile_path)
+        print(f"cProfile data written to {cprofile_path}")
+    if sampler is not None:
+        sampler.write_folded(folded_path)
+        print(f"folded stacks written to {folded_path}")
+    if stats_path:
+        statistics.dump(stats_path)
+        print(f"search statistics written to {stats_path}")
+
+
+def run_parallel_bench(depth, worker_counts, positions=BENCH_POSITIONS):
+    """
+    Time a fixed-depth search of every position for each worker count.
+    Returns a list of (workers, seconds, nodes).
+    """
+    rows = []
+    for workers in worker_counts:
+        # Warm the pool up first so process start-up is not part of the
+        # timing, and start every position from empty tables in each worker.
+        parallel_search(chess.Board(), 1, workers)
+        start = time.perf_counter()
+        nodes = 0
+        for fen in positions:
+            nodes += parallel_search(chess.Board(fen), depth, workers, clear_tables=True).nodes
+        rows.append((workers, time.perf_counter() - start, nodes))
+    return rows
+
+
+def print_parallel_bench(depth, rows):
+    print(f"== parallel root split, depth {depth}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'sec':>8} {'nodes':>10} {'speedup':>8}")
+    base = rows[0][1]
+    for workers, seconds, nodes in rows:
+        print(f"{workers:>7} {seconds:>8.2f} {nodes:>10} {base / seconds:>7.2f}x")
+
+
+def run_eval_bench(repeat=20, positions=BENCH_POSITIONS):
+    """
+    Time evaluating all children of each bench position one by one with
+    evaluate() and in one batch_eval.evaluate_children() call.
+    Returns a list of (fen, children, scalar seconds, batch seconds).
+    """
+    rows = []
+    for fen in positions:
+        board = chess.Board(fen)
+        moves = list(board.legal_moves)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for move in moves:
+                board.push(move)
+                evaluate(board)
+                board.pop()
+        scalar = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            batch_eval.evaluate_children(board, moves)
+        batch = (time.perf_counter() - start) / repeat
+        rows.append((fen, len(moves), scalar, batch))
+    return rows
+
+
+def print_eval_bench(rows):
+    print("== evaluation of all children, scalar vs NumPy batch")
+    print(f"{'moves':>5} {'scalar us':>10} {'batch us':>9} {'speedup':>8}  fen")
+    for fen, moves, scalar, batch in rows:
+        print(f"{moves:>5} {1e6 * scalar:>10.0f} {1e6 * batch:>9.0f} {scalar / batch:>7.2f}x  {fen}")
+
+
+def run_eval_size_bench(sizes=(4, 8, 16, 24, 32, 48, 64, 128, 256), fen=BENCH_POSITIONS[3], total=400):
+    """
+    Time scalar and batch evaluation of batches of each size (children of
+    fen, repeated as needed), evaluating about total positions per size.
+    Returns a list of (size, scalar seconds, batch seconds) per batch.
+    """
+    board = chess.Board(fen)
+    children = list(board.legal_moves)
+    rows = []
+    for size in sizes:
+        moves = (children * (size // len(children) + 1))[:size]
+        repeat = max(5, total // size)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for move in moves:
+                board.push(move)
+                evaluate(board)
+                board.pop()
+        scalar = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            batch_eval.evaluate_children(board, moves)
+        rows.append((size, scalar, (time.perf_counter() - start) / repeat))
+    return rows
+
+
+def print_eval_size_bench(rows):
+    print("== batch size, scalar vs NumPy batch")
+    print(f"{'size':>5} {'scalar us':>10} {'batch us':>9} {'speedup':>8}")
+    for size, scalar, batch in rows:
+        print(f"{size:>5} {1e6 * scalar:>10.0f} {1e6 * batch:>9.0f} {scalar / batch:>7.2f}x")
+    faster = [size for size, scalar, batch in rows if batch < scalar]
+    print(f"batch breaks even at about {faster[0]} positions" if faster else "batch never faster")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    search = sub.add_parser("search", help="fixed-depth search over the bench positions")
+    search.add_argument("--depth", type=int, default=4)
+    search.add_argument("--hash", type=int, default=16, help="transposition table size in MB")
+    search.add_argument("--compare-ordering", action="store_true",
+                        help="also run with move ordering disabled")
+
+    selective = sub.add_parser("selective", help="depth reached with null move, LMR and futility on/off")
+    selective.add_argument("--time", type=float, default=2.0, help="seconds per position")
+    selective.add_argument("--hash", type=int, default=16, help="transposition table size in MB")
+
+    profile = sub.add_parser("profile", help="per-iteration statistics and time attribution for one search")
+    profile.add_argument("--fen", default=BENCH_POSITIONS[1])
+    profile.add_argument("--depth", type=int, default=5)
+    profile.add_argument("--time", type=float, help="seconds (stops before --depth if reached)")
+    profile.add_argument("--hash", type=int, default=16, help="transposition table size in MB")
+    profile.add_argument("--cprofile", help="write pstats data here (snakeviz, gprof2dot...)")
+    profile.add_argument("--folded", help="write sampled stacks here in flamegraph folded format")
+    profile.add_argument("--json", help="write the search statistics here")
+
+    parallel = sub.add_parser("parallel", help="speedup of the root-split search vs worker count")
+    parallel.add_argument("--depth", type=int, default=4)
+    parallel.add_argument("--workers", type=int, nargs="+",
+                          help="worker counts to try (default: 1, 2, 4, ... up to the CPU count)")
+
+    evaluation = sub.add_parser("eval", help="scalar vs batched (NumPy) evaluation of sibling positions")
+    evaluation.add_argument("--repeat", type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.command == "search":
+        print_search_bench(f"depth {args.depth}, move ordering on",
+                           run_search_bench(args.depth, SearchOptions(), args.hash))
+        if args.compare_ordering:
+            print_search_bench(f"depth {args.depth}, move ordering off",
+                               run_search_bench(args.depth, SearchOptions(move_ordering=False), args.hash))
+    elif args.command == "selective":
+        print_selective_bench(args.time, run_selective_bench(args.time, hash_mb=args.hash))
+    elif args.command == "profile":
+        run_profile(args.fen, args.depth, args.time, args.hash, args.cprofile, args.folded, args.json)
+    elif args.command == "eval":
+        if not batch_eval.available():
+            parser.error("the eval benchmark needs NumPy")
+        print_eval_bench(run_eval_bench(args.repeat))
+        print_eval_size_bench(run_eval_size_bench())
+    elif args.command == "parallel":
+        worker_counts = args.workers
+        if not worker_counts:
+            worker_counts = [1]
+            while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+                worker_counts.append(worker_counts[-1] * 2)
+        print_parallel_bench(args.depth, run_parallel_bench(args.depth, worker_counts))
+
+
+if __name__ == "__main__":
+    main()
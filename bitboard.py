@@ -0,0 +1,238 @@
+"""
+Bitboard move generation for the list-of-lists boards used in board.py.
+
+Squares are numbered row * 8 + col, matching board[row][col] (row 0 is
+Black's back rank). Moves are produced as (start_row, start_col, end_row,
+end_col) tuples under the same rules as board.is_valid_move: no castling,
+no en passant, and a pawn reaching the last rank is a single move (the
+promotion piece is chosen when the move is played).
+"""
+
+BB_ALL = (1 << 64) - 1
+BB_SQUARES = [1 << square for square in range(64)]
+
+# (row step, col step) for each sliding direction.
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def _step_attacks(steps):
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        for row_step, col_step in steps:
+            r, c = row + row_step, col + col_step
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= BB_SQUARES[r * 8 + c]
+        table.append(mask)
+    return table
+
+
+def _rays(direction):
+    row_step, col_step = direction
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        r, c = row + row_step, col + col_step
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= BB_SQUARES[r * 8 + c]
+            r, c = r + row_step, c + col_step
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _step_attacks([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _step_attacks([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+# PAWN_ATTACKS[color][square]: squares a pawn of that color captures on.
+PAWN_ATTACKS = {
+    'w': _step_attacks([(-1, -1), (-1, 1)]),
+    'b': _step_attacks([(1, -1), (1, 1)]),
+}
+
+# Rays in each direction, tagged with whether the direction increases the
+# square index (nearest blocker is then the lowest set bit).
+ROOK_RAYS = [(_rays(d), d[0] * 8 + d[1] > 0) for d in ROOK_DIRECTIONS]
+BISHOP_RAYS = [(_rays(d), d[0] * 8 + d[1] > 0) for d in BISHOP_DIRECTIONS]
+
+# BETWEEN[a][b]: squares strictly between two aligned squares, else 0.
+BETWEEN = [[0] * 64 for _ in range(64)]
+for _rays_table, _positive in ROOK_RAYS + BISHOP_RAYS:
+    for _a in range(64):
+        _ray = _rays_table[_a]
+        _b_mask = _ray
+        while _b_mask:
+            _b_bit = _b_mask & -_b_mask
+            _b = _b_bit.bit_length() - 1
+            BETWEEN[_a][_b] = _ray & ~_rays_table[_b] & ~_b_bit
+            _b_mask ^= _b_bit
+
+
+def _slider_attacks(square, occupied, rays):
+    attacks = 0
+    for table, positive in rays:
+        ray = table[square]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    return _slider_attacks(square, occupied, ROOK_RAYS)
+
+
+def bishop_attacks(square, occupied):
+    return _slider_attacks(square, occupied, BISHOP_RAYS)
+
+
+def scan(mask):
+    """
+    Yield the square index of every set bit in mask.
+    """
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def board_to_bitboards(board):
+    """
+    Convert an 8x8 board into {'w': {'P': bb, ...}, 'b': {...}} piece bitboards.
+    """
+    pieces = {
+        'w': {'P': 0, 'N': 0, 'B': 0, 'R': 0, 'Q': 0, 'K': 0},
+        'b': {'P': 0, 'N': 0, 'B': 0, 'R': 0, 'Q': 0, 'K': 0},
+    }
+    square = 0
+    for row in board:
+        for piece in row:
+            if piece != '--':
+                pieces[piece[0]][piece[1]] |= BB_SQUARES[square]
+            square += 1
+    return pieces
+
+
+def occupancy(side):
+    return side['P'] | side['N'] | side['B'] | side['R'] | side['Q'] | side['K']
+
+
+def attackers_to(square, side, color, occupied):
+    """
+    Bitboard of pieces in `side` (belonging to `color`) that attack square.
+    """
+    enemy = 'b' if color == 'w' else 'w'
+    return (
+        (KNIGHT_ATTACKS[square] & side['N'])
+        | (KING_ATTACKS[square] & side['K'])
+        | (PAWN_ATTACKS[enemy][square] & side['P'])
+        | (bishop_attacks(square, occupied) & (side['B'] | side['Q']))
+        | (rook_attacks(square, occupied) & (side['R'] | side['Q']))
+    )
+
+
+def is_in_check(board, is_white):
+    """
+    Bitboard equivalent of board.is_king_in_check.
+    """
+    pieces = board_to_bitboards(board)
+    us, them = ('w', 'b') if is_white else ('b', 'w')
+    king = pieces[us]['K']
+    if not king:
+        return False
+    occupied = occupancy(pieces['w']) | occupancy(pieces['b'])
+    return bool(attackers_to(king.bit_length() - 1, pieces[them], them, occupied))
+
+
+def generate_legal_moves(board, is_white_turn):
+    """
+    Gets all legal moves for the current player.
+    Returns a sorted list of tuples (start_row, start_col, end_row, end_col),
+    the same list board.get_legal_moves_by_scan produces.
+    """
+    pieces = board_to_bitboards(board)
+    us, them = ('w', 'b') if is_white_turn else ('b', 'w')
+    ours, theirs = pieces[us], pieces[them]
+    own = occupancy(ours)
+    enemy = occupancy(theirs)
+    occupied = own | enemy
+
+    moves = []
+    check_mask = BB_ALL
+    pin_rays = {}
+    king = ours['K']
+
+    if king:
+        king_square = king.bit_length() - 1
+        checkers = attackers_to(king_square, theirs, them, occupied)
+
+        # King moves: the target must not be attacked once the king has left
+        # its square (so it cannot step back along a checking ray).
+        without_king = occupied ^ king
+        for target in scan(KING_ATTACKS[king_square] & ~own):
+            if not attackers_to(target, theirs, them, without_king):
+                moves.append((king_square, target))
+
+        if checkers & (checkers - 1):
+            # Double check: only the king can move.
+            return _to_tuples(moves)
+        if checkers:
+            checker = checkers.bit_length() - 1
+            check_mask = checkers | BETWEEN[king_square][checker]
+
+        # Pinned pieces may only move along the line to their pinner.
+        snipers = (
+            (rook_attacks(king_square, enemy) & (theirs['R'] | theirs['Q']))
+            | (bishop_attacks(king_square, enemy) & (theirs['B'] | theirs['Q']))
+        )
+        for sniper in scan(snipers):
+            blockers = BETWEEN[king_square][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pin_rays[blockers.bit_length() - 1] = BETWEEN[king_square][sniper] | BB_SQUARES[sniper]
+
+    targets_mask = ~own & check_mask
+
+    # Pawns.
+    forward = -8 if us == 'w' else 8
+    start_row = 6 if us == 'w' else 1
+    for square in scan(ours['P']):
+        targets = PAWN_ATTACKS[us][square] & enemy
+        one = square + forward
+        if 0 <= one < 64 and not occupied & BB_SQUARES[one]:
+            targets |= BB_SQUARES[one]
+            two = one + forward
+            if square // 8 == start_row and not occupied & BB_SQUARES[two]:
+                targets |= BB_SQUARES[two]
+        targets &= targets_mask & pin_rays.get(square, BB_ALL)
+        for target in scan(targets):
+            moves.append((square, target))
+
+    # Knights (a pinned knight can never stay on its pin line).
+    for square in scan(ours['N']):
+        if square in pin_rays:
+            continue
+        for target in scan(KNIGHT_ATTACKS[square] & targets_mask):
+            moves.append((square, target))
+
+    # Sliders.
+    for square in scan(ours['B'] | ours['Q']):
+        targets = bishop_attacks(square, occupied) & targets_mask & pin_rays.get(square, BB_ALL)
+        for target in scan(targets):
+            moves.append((square, target))
+    for square in scan(ours['R'] | ours['Q']):
+        targets = rook_attacks(square, occupied) & targets_mask & pin_rays.get(square, BB_ALL)
+        for target in scan(targets):
+            moves.append((square, target))
+
+    return _to_tuples(moves)
+
+
+def _to_tuples(moves):
+    moves.sort()
+    return [(start // 8, start % 8, end // 8, end % 8) for start, end in moves]
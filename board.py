@@ -1,3 +1,5 @@
+from bitboard import generate_legal_moves
+
 def create_initial_board():
     """
     Creates the initial chessboard setup.
@@ -153,26 +155,51 @@ def is_valid_move(board, start_row, start_col, end_row, end_col, piece):
 # Handle pawn promotion
 def handle_pawn_promotion(board, end_row, end_col, piece, promotion_piece='Q'):
     """
-    Handles pawn promotion.
+    Handles pawn promotion, replacing the pawn on the board in place.
     Default promotion piece is Queen if not specified.
-    Returns the new board after promotion.
+    Returns the board.
     """
-    # Create a copy of the board to avoid modifying the original
-    new_board = [row[:] for row in board]
-    
     # Replace the pawn with the promoted piece
     # Ensure we're using the correct color from the original pawn
     color = piece[0]  # Extract the color ('w' or 'b')
-    new_board[end_row][end_col] = color + promotion_piece
+    board[end_row][end_col] = color + promotion_piece
     
-    return new_board
+    return board
+
+# Play a move in place and return what is needed to take it back
+def make_move(board, start_row, start_col, end_row, end_col, promotion_piece=None):
+    """
+    Makes a move directly on the board, without copying it.
+    A pawn reaching the last rank is promoted (to Queen if not specified).
+    Returns an undo record (start_row, start_col, end_row, end_col, piece, captured)
+    to pass to unmake_move. board.py has no castling or en passant, so the moved
+    piece and the captured square's old contents are all the state there is.
+    """
+    piece = board[start_row][start_col]
+    captured = board[end_row][end_col]
+    board[start_row][start_col] = '--'
+    if piece[1] == 'P' and end_row == (0 if piece[0] == 'w' else 7):
+        board[end_row][end_col] = piece[0] + (promotion_piece or 'Q')
+    else:
+        board[end_row][end_col] = piece
+    return start_row, start_col, end_row, end_col, piece, captured
+
+# Take back a move played with make_move
+def unmake_move(board, undo):
+    """
+    Restores the board to its state before the make_move that returned undo.
+    """
+    start_row, start_col, end_row, end_col, piece, captured = undo
+    board[start_row][start_col] = piece
+    board[end_row][end_col] = captured
+
 # Make the move on the board if it's valid
 def move_piece(board, start_row, start_col, end_row, end_col, piece, is_white_turn, promotion_piece=None):
     """
-    Moves a piece on the board.
+    Moves a piece on the board, in place (see make_move).
     Checks if the move is valid based on chess rules.
-    Returns a tuple (new_board, success, is_promotion):
-    - new_board: The board after the move (or original if move is invalid)
+    Returns a tuple (board, success, is_promotion):
+    - board: The same board, with the move played if it was valid
     - success: True if the move was successful, False otherwise
     - is_promotion: True if the move resulted in a pawn promotion
     """
@@ -184,20 +211,9 @@ def move_piece(board, start_row, start_col, end_row, end_col, piece, is_white_tu
     is_valid, is_promotion = is_valid_move(board, start_row, start_col, end_row, end_col, piece)
     
     if is_valid:
-        # Create a copy of the board
-        new_board = [row[:] for row in board]
-        
-        # Move the piece
-        new_board[end_row][end_col] = piece
-        new_board[start_row][start_col] = '--'
-        
-        # Handle pawn promotion
-        if is_promotion:
-            if promotion_piece is None:
-                promotion_piece = 'Q'  # Default to Queen if not specified
-            new_board[end_row][end_col] = piece[0] + promotion_piece
-            
-        return new_board, True, is_promotion
+        # Move the piece (make_move promotes to Queen if not specified)
+        make_move(board, start_row, start_col, end_row, end_col, promotion_piece)
+        return board, True, is_promotion
     
     return board, False, False
 
@@ -236,6 +252,17 @@ def get_legal_moves(board, is_white_turn):
     """
     Gets all legal moves for the current player.
     Returns a list of tuples (start_row, start_col, end_row, end_col).
+    Uses the bitboard generator in bitboard.py.
+    """
+    return generate_legal_moves(board, is_white_turn)
+
+# Reference implementation: try every piece against every target square
+def get_legal_moves_by_scan(board, is_white_turn):
+    """
+    Gets all legal moves for the current player by testing every piece
+    against all 64 target squares with is_valid_move.
+    Much slower than get_legal_moves; kept as the reference for perft checks.
+    Returns a list of tuples (start_row, start_col, end_row, end_col).
     """
     legal_moves = []
     player_color = 'w' if is_white_turn else 'b'
@@ -250,12 +277,12 @@ def get_legal_moves(board, is_white_turn):
                     for end_col in range(8):
                         if is_valid_move(board, start_row, start_col, end_row, end_col, piece)[0]:
                             # Make the move temporarily
-                            temp_board = [row[:] for row in board]
-                            temp_board[end_row][end_col] = piece
-                            temp_board[start_row][start_col] = '--'
-                            
+                            undo = make_move(board, start_row, start_col, end_row, end_col)
+                            in_check = is_king_in_check(board, is_white_turn)
+                            unmake_move(board, undo)
+
                             # Check if the move would put the king in check
-                            if not is_king_in_check(temp_board, is_white_turn):
+                            if not in_check:
                                 legal_moves.append((start_row, start_col, end_row, end_col))
     
     return legal_moves
@@ -297,9 +324,10 @@ def get_promotion_piece_choice(board, end_row, end_col, piece):
 # Handle pawn promotion in the move function
 def move_piece_with_promotion(board, start_row, start_col, end_row, end_col, is_white_turn):
     """
-    Full move implementation with pawn promotion handling.
-    Returns a tuple (new_board, success, message):
-    - new_board: The board after the move
+    Full move implementation with pawn promotion handling. The move is
+    played on board in place.
+    Returns a tuple (board, success, message):
+    - board: The same board, with the move played if it was successful
     - success: True if the move was successful
     - message: A message describing the result (e.g., "Promotion to Queen")
     """
@@ -315,13 +343,11 @@ def move_piece_with_promotion(board, start_row, start_col, end_row, end_col, is_
     if not is_valid:
         return board, False, "Invalid move"
     
-    # Create a new board with the move
-    new_board = [row[:] for row in board]
-    new_board[end_row][end_col] = piece
-    new_board[start_row][start_col] = '--'
-    
     # Check if the move would put the player's king in check
-    if is_king_in_check(new_board, is_white_turn):
+    undo = make_move(board, start_row, start_col, end_row, end_col)
+    in_check = is_king_in_check(board, is_white_turn)
+    unmake_move(board, undo)
+    if in_check:
         return board, False, "Move would put your king in check"
     
     # Handle pawn promotion
@@ -329,10 +355,10 @@ def move_piece_with_promotion(board, start_row, start_col, end_row, end_col, is_
         # Get the promotion piece choice
         promotion_piece = get_promotion_piece_choice(board, end_row, end_col, piece)
         
-        # Make sure the promoted piece has the same color as the original pawn
-        piece_color = piece[0]  # This is either 'w' or 'b'
-        new_board[end_row][end_col] = piece_color + promotion_piece
+        # make_move keeps the original pawn's color for the promoted piece
+        make_move(board, start_row, start_col, end_row, end_col, promotion_piece)
         
-        return new_board, True, f"Promoted to {promotion_piece}"
+        return board, True, f"Promoted to {promotion_piece}"
     
-    return new_board, True, "Move successful"
\ No newline at end of file
+    make_move(board, start_row, start_col, end_row, end_col)
+    return board, True, "Move successful"
\ No newline at end of file
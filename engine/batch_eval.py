@@ -0,0 +1,96 @@
+import chess
+from engine.evaluator import (PHASE_WEIGHTS, PIECE_SQUARE_EG, PIECE_SQUARE_MG, TOTAL_PHASE, mobility,
+                              pawn_structure, taper)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; evaluate() covers single positions without it.
+    np = None
+
+# A batch call has a fixed NumPy overhead of about 2 ms, so it only beats
+# calling evaluate() once per position from roughly 20-30 positions (about
+# 1.5x faster at 48, 3x from a few hundred); below that it is slower. The
+# search evaluates one node at a time and does not use it. `bench.py eval`
+# measures both paths and the break-even size.
+
+# Order of the piece bitboards in a batch row: White P N B R Q K, then Black.
+PIECE_ORDER = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+
+if np is not None:
+    # (12, 64) signed material plus piece-square values, and per-row phase weights.
+    MG_TABLE = np.array([PIECE_SQUARE_MG[color][piece_type] for color, piece_type in PIECE_ORDER], dtype=np.int64)
+    EG_TABLE = np.array([PIECE_SQUARE_EG[color][piece_type] for color, piece_type in PIECE_ORDER], dtype=np.int64)
+    PHASE_TABLE = np.array([PHASE_WEIGHTS[piece_type] for _, piece_type in PIECE_ORDER], dtype=np.int64)
+
+
+def available():
+    return np is not None
+
+
+def _popcount(bb):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bb).astype(np.int64)
+    # NumPy < 2.0: count the bits of each byte.
+    return np.unpackbits(bb.view(np.uint8).reshape(len(bb), 8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def board_bitboards(board):
+    """
+    The 12 piece bitboards of a board, in PIECE_ORDER.
+    """
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    masks = (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+    return [mask & white for mask in masks] + [mask & black for mask in masks]
+
+
+def evaluate_bitboards(bitboards):
+    """
+    Evaluate an (N, 12) uint64 array of piece bitboards (rows as returned by
+    board_bitboards). Returns an int64 array of N scores, identical to what
+    engine.evaluator.evaluate gives for each position.
+    """
+    bitboards = np.ascontiguousarray(bitboards, dtype='<u8')
+    count = len(bitboards)
+
+    # Piece-square and phase: expand every bitboard to 64 0/1 squares.
+    squares = np.unpackbits(bitboards.view(np.uint8).reshape(count, 12, 8), axis=2, bitorder='little')
+    squares = squares.astype(np.int64)
+    mg = np.einsum('nps,ps->n', squares, MG_TABLE)
+    eg = np.einsum('nps,ps->n', squares, EG_TABLE)
+    phase = np.minimum(squares.sum(axis=2) @ PHASE_TABLE, TOTAL_PHASE)
+
+    # Mobility and pawn structure run the evaluator's own bitboard code on
+    # whole columns at once.
+    white, black = bitboards[:, :6], bitboards[:, 6:]
+    white_all = np.bitwise_or.reduce(white, axis=1)
+    black_all = np.bitwise_or.reduce(black, axis=1)
+    occupied = white_all | black_all
+    white_mg, white_eg = mobility(white[:, 1], white[:, 2], white[:, 3], white[:, 4], white_all, occupied, _popcount)
+    black_mg, black_eg = mobility(black[:, 1], black[:, 2], black[:, 3], black[:, 4], black_all, occupied, _popcount)
+    pawn_mg, pawn_eg = pawn_structure(white[:, 0], black[:, 0], _popcount)
+
+    mg = mg + pawn_mg + white_mg - black_mg
+    eg = eg + pawn_eg + white_eg - black_eg
+    return taper(mg, eg, phase)
+
+
+def evaluate_batch(boards):
+    """
+    Evaluate many chess.Boards in one vectorized call. Returns an int64 array.
+    """
+    return evaluate_bitboards(np.array([board_bitboards(board) for board in boards], dtype=np.uint64).reshape(-1, 12))
+
+
+def evaluate_children(board, moves):
+    """
+    Scores of the positions after each of moves (e.g. all children of a
+    frontier node), evaluated together. The board is restored afterwards.
+    """
+    rows = []
+    for move in moves:
+        board.push(move)
+        rows.append(board_bitboards(board))
+        board.pop()
+    return evaluate_bitboards(np.array(rows, dtype=np.uint64).reshape(-1, 12))
+
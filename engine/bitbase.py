@@ -0,0 +1,305 @@
+import mmap
+import os
+import struct
+import threading
+import chess
+
+# Where generate_bitbases.py writes its tables and the search looks for them.
+DEFAULT_BITBASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bitbases")
+
+# Tables cover positions with at most this many pieces, kings included.
+MAX_PIECES = 4
+
+# Probe results, from the side to move's point of view.
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# File layout: header (magic, version, entry count), then one bit per
+# position for "side to move wins", then one bit per position for "side to
+# move loses". Positions with neither bit set are draws (or cannot occur).
+MAGIC = b"CEBB"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+EXTENSION = ".bb"
+
+# Piece letters in table names, most valuable first: "KRKP" is king and
+# rook against king and pawn, White being the side written first.
+PIECE_LETTERS = "QRBNP"
+LETTER_TYPES = {"Q": chess.QUEEN, "R": chess.ROOK, "B": chess.BISHOP, "N": chess.KNIGHT, "P": chess.PAWN}
+TYPE_LETTERS = {piece_type: letter for letter, piece_type in LETTER_TYPES.items()}
+LETTER_VALUES = {"Q": 9, "R": 5, "B": 3, "N": 3, "P": 1}
+
+# White king squares kept after symmetry: the a1-d1-d4 triangle for tables
+# without pawns (any of the 8 board symmetries may be applied), files a-d
+# when there are pawns (only the left-right mirror keeps pawn moves valid).
+TRIANGLE = [square for square in chess.SQUARES
+            if chess.square_file(square) <= 3 and chess.square_rank(square) <= chess.square_file(square)]
+LEFT_HALF = [square for square in chess.SQUARES if chess.square_file(square) <= 3]
+
+
+def table_name(white, black):
+    """
+    Table name for two sides' non-king pieces, given as strings of letters.
+    """
+    return ("K" + "".join(sorted(white, key=PIECE_LETTERS.index))
+            + "K" + "".join(sorted(black, key=PIECE_LETTERS.index)))
+
+
+def split_name(name):
+    """
+    ("Q", "") for "KQK": the non-king pieces of White and Black.
+    """
+    name = name.upper()
+    if name.count("K") != 2 or not name.startswith("K") or set(name) - set("K" + PIECE_LETTERS):
+        raise ValueError(f"not a table name: {name!r}")
+    second = name.index("K", 1)
+    return name[1:second], name[second + 1:]
+
+
+def canonical_name(name):
+    """
+    The orientation a table is generated in: the side with more material
+    (then the alphabetically later pieces) written first.
+    """
+    white, black = split_name(name)
+    flipped = table_name(black, white)
+    name = table_name(white, black)
+    key = lambda pieces: (sum(LETTER_VALUES[letter] for letter in pieces), len(pieces), pieces)
+    if key(split_name(flipped)[0]) > key(white):
+        return flipped
+    return name
+
+
+def is_trivial_draw(white, black):
+    """
+    Material neither side can force mate with: at most one minor piece each.
+    """
+    return all(len(side) <= 1 and side in ("", "B", "N") for side in (white, black))
+
+
+def _mirror_file(square):
+    return square ^ 7
+
+
+def _mirror_rank(square):
+    return square ^ 56
+
+
+def _transpose(square):
+    return ((square & 7) << 3) | (square >> 3)
+
+
+class TableLayout:
+    """
+    Maps a position of one table to its bit index. Pieces are listed as
+    white king, black king, White's other pieces, Black's other pieces, in
+    table name order. The index is side to move, white king slot and the
+    other pieces' squares; positions equivalent by symmetry share an index.
+    """
+
+    def __init__(self, name):
+        self.name = table_name(*split_name(name))
+        white, black = split_name(self.name)
+        self.pieces = ([(chess.WHITE, chess.KING), (chess.BLACK, chess.KING)]
+                       + [(chess.WHITE, LETTER_TYPES[letter]) for letter in white]
+                       + [(chess.BLACK, LETTER_TYPES[letter]) for letter in black])
+        self.has_pawns = "P" in white + black
+        self.king_squares = LEFT_HALF if self.has_pawns else TRIANGLE
+        self.king_slots = {square: slot for slot, square in enumerate(self.king_squares)}
+        self.others = len(self.pieces) - 1
+        self.per_side = len(self.king_squares) * 64 ** self.others
+        self.size = 2 * self.per_side
+
+    def canonical(self, squares):
+        """
+        Apply the symmetry that brings the white king into king_squares.
+        """
+        king = squares[0]
+        if chess.square_file(king) > 3:
+            squares = [_mirror_file(square) for square in squares]
+            king = squares[0]
+        if self.has_pawns:
+            return squares
+        if chess.square_rank(king) > 3:
+            squares = [_mirror_rank(square) for square in squares]
+            king = squares[0]
+        file, rank = chess.square_file(king), chess.square_rank(king)
+        if rank > file:
+            return [_transpose(square) for square in squares]
+        if rank == file:
+            # King on the diagonal: the first piece off it decides.
+            for square in squares[1:]:
+                if chess.square_rank(square) != chess.square_file(square):
+                    if chess.square_rank(square) > chess.square_file(square):
+                        return [_transpose(square) for square in squares]
+                    break
+        return squares
+
+    def index(self, squares, turn):
+        """
+        Bit index of the position with pieces on squares (in layout order)
+        and turn to move.
+        """
+        squares = self.canonical(squares)
+        index = self.king_slots[squares[0]]
+        for square in squares[1:]:
+            index = index * 64 + square
+        return index if turn == chess.WHITE else index + self.per_side
+
+    def decode(self, index):
+        """
+        Inverse of index for canonical positions: (turn, squares).
+        """
+        turn = chess.WHITE
+        if index >= self.per_side:
+            turn = chess.BLACK
+            index -= self.per_side
+        squares = []
+        for _ in range(self.others):
+            index, square = divmod(index, 64)
+            squares.append(square)
+        squares.append(self.king_squares[index])
+        squares.reverse()
+        return turn, squares
+
+
+def write_table(path, layout, wins, losses):
+    """
+    Write a table file from two bytearrays of packed bits (bit i of the
+    array is byte i >> 3, bit i & 7). The file is replaced atomically.
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, layout.size))
+        handle.write(wins)
+        handle.write(losses)
+    os.replace(temporary, path)
+
+
+class Table:
+    """
+    One memory-mapped table file. Probing reads two bits, touching at most
+    two pages of the file.
+    """
+
+    def __init__(self, path, layout):
+        self.layout = layout
+        with open(path, "rb") as handle:
+            self.map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = HEADER.unpack_from(self.map)
+        packed = (size + 7) // 8
+        if magic != MAGIC or version != VERSION or size != layout.size or len(self.map) != HEADER.size + 2 * packed:
+            self.map.close()
+            raise ValueError(f"{path} is not a {layout.name} bitbase")
+        self.losses_offset = HEADER.size + packed
+
+    def probe(self, squares, turn):
+        index = self.layout.index(squares, turn)
+        bit = 1 << (index & 7)
+        if self.map[HEADER.size + (index >> 3)] & bit:
+            return WIN
+        if self.map[self.losses_offset + (index >> 3)] & bit:
+            return LOSS
+        return DRAW
+
+    def close(self):
+        self.map.close()
+
+
+class Bitbases:
+    """
+    Win/draw/loss tables for endings with up to MAX_PIECES pieces, written
+    by generate_bitbases.py. Each table is a file of packed bits in
+    directory, memory-mapped the first time a position with its material is
+    probed; a missing table just means probe() returns None.
+    """
+
+    def __init__(self, directory=DEFAULT_BITBASE_DIR):
+        self.directory = directory
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        """
+        The Table for name, or None when there is no usable file for it.
+        """
+        try:
+            return self.tables[name]
+        except KeyError:
+            pass
+        with self.lock:
+            if name not in self.tables:
+                path = os.path.join(self.directory, name + EXTENSION) if self.directory else None
+                table = None
+                if path and os.path.isfile(path):
+                    try:
+                        table = Table(path, TableLayout(name))
+                    except (OSError, ValueError):
+                        table = None
+                self.tables[name] = table
+            return self.tables[name]
+
+    def close(self):
+        with self.lock:
+            for table in self.tables.values():
+                if table is not None:
+                    table.close()
+            self.tables = {}
+
+    def set_directory(self, directory):
+        self.close()
+        self.directory = directory
+
+    def probe_pieces(self, pieces, turn):
+        """
+        Result for the side to move given pieces as (color, piece_type,
+        square) tuples. Returns WIN, DRAW, LOSS or None if no table has it.
+        """
+        white = "".join(TYPE_LETTERS[piece_type] for color, piece_type, _ in pieces
+                        if color == chess.WHITE and piece_type != chess.KING)
+        black = "".join(TYPE_LETTERS[piece_type] for color, piece_type, _ in pieces
+                        if color == chess.BLACK and piece_type != chess.KING)
+        if is_trivial_draw(white, black):
+            return DRAW
+        name = table_name(white, black)
+        table = self.table(name)
+        if table is None:
+            # Stored with the colours swapped: mirror the board vertically.
+            name = table_name(black, white)
+            table = self.table(name)
+            if table is None:
+                return None
+            pieces = [(not color, piece_type, square ^ 56) for color, piece_type, square in pieces]
+            turn = not turn
+        return table.probe(self.squares(table.layout, pieces), turn)
+
+    @staticmethod
+    def squares(layout, pieces):
+        """
+        Order the pieces' squares as layout expects.
+        """
+        remaining = list(pieces)
+        squares = []
+        for color, piece_type in layout.pieces:
+            for i, (piece_color, piece, square) in enumerate(remaining):
+                if piece_color == color and piece == piece_type:
+                    squares.append(square)
+                    del remaining[i]
+                    break
+        return squares
+
+    def probe(self, board):
+        """
+        Result for the side to move of a chess.Board, or None when the
+        position has too many pieces, castling or en passant rights, or no
+        table.
+        """
+        occupied = board.occupied
+        if chess.popcount(occupied) > MAX_PIECES or board.castling_rights:
+            return None
+        if board.ep_square is not None and board.has_legal_en_passant():
+            return None
+        pieces = [(bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square]), board.piece_type_at(square), square)
+                  for square in chess.scan_forward(occupied)]
+        return self.probe_pieces(pieces, board.turn)
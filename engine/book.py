@@ -0,0 +1,87 @@
+import os
+import random
+import threading
+import chess.polyglot
+
+# Used when no path is given. No book ships with the engine; drop any
+# Polyglot .bin file here (or point set_book_path / the UCI BookFile option at one).
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "books", "book.bin")
+
+# Stop consulting the book after this many plies.
+DEFAULT_MAX_PLY = 24
+
+
+class OpeningBook:
+    """
+    Polyglot opening book.
+
+    A Polyglot book is a file of 16-byte records (key, move, weight, learn)
+    sorted by the position's Polyglot Zobrist key. The file is memory-mapped
+    by chess.polyglot.MemoryMappedReader rather than read, so opening it
+    costs nothing however large the book is, and a lookup is a binary search
+    on the keys that touches only a few pages. The file is opened on first
+    use; a missing file simply means there is no book.
+    """
+
+    def __init__(self, path=DEFAULT_BOOK_PATH, max_ply=DEFAULT_MAX_PLY, rng=None):
+        self.path = path
+        self.max_ply = max_ply
+        self.random = rng or random.Random()
+        self.reader = None
+        self.opened = False
+        self.lock = threading.Lock()
+
+    def open(self):
+        """
+        Map the book file if that has not been tried yet. Returns the reader,
+        or None when there is no usable book.
+        """
+        with self.lock:
+            if not self.opened:
+                self.opened = True
+                if self.path and os.path.isfile(self.path):
+                    try:
+                        self.reader = chess.polyglot.open_reader(self.path)
+                    except (OSError, ValueError):
+                        # Unreadable, or empty (an empty file cannot be mapped).
+                        self.reader = None
+            return self.reader
+
+    def close(self):
+        with self.lock:
+            if self.reader is not None:
+                self.reader.close()
+            self.reader = None
+            self.opened = False
+
+    def set_path(self, path):
+        """
+        Switch to another book file (None disables the book).
+        """
+        self.close()
+        self.path = path
+
+    def entries(self, board):
+        """
+        Legal book entries for board, in file order.
+        """
+        reader = self.open()
+        if reader is None:
+            return []
+        return list(reader.find_all(board))
+
+    def move(self, board):
+        """
+        Pick a book move for board, at random in proportion to the entry
+        weights. Returns None when the position is not in the book or the
+        game is past max_ply.
+        """
+        if board.ply() >= self.max_ply:
+            return None
+        reader = self.open()
+        if reader is None:
+            return None
+        try:
+            return reader.weighted_choice(board, random=self.random).move
+        except IndexError:
+            return None
@@ -0,0 +1,152 @@
+import threading
+import time
+import chess
+
+NS_PER_SECOND = 1_000_000_000
+
+
+def thread_schedule(seconds, callback):
+    """
+    Default scheduler for GameClock: run callback on a timer thread after
+    seconds. Returns a function that cancels it.
+    """
+    timer = threading.Timer(seconds, callback)
+    timer.daemon = True
+    timer.start()
+    return timer.cancel
+
+
+class GameClock:
+    """
+    Two-sided chess clock on time.monotonic_ns.
+
+    Nothing ticks: the running side's remaining time is worked out from the
+    moment its clock was started whenever it is asked for, so the clock
+    cannot drift however busy the program is. A time control has a base
+    time, an increment added after each move (Fischer) and a delay at the
+    start of each move before the clock starts counting down (US delay).
+
+    Running out of time is detected by one scheduled deadline for the side
+    to move, rearmed whenever the clock is started, pressed or stopped;
+    on_flag(color) is then called once. schedule(seconds, callback) sets
+    up the deadline and returns a cancel function. The default runs it on
+    a timer thread; a GUI can pass one that uses its own event loop so
+    on_flag runs on the GUI thread.
+    """
+
+    def __init__(self, initial, increment=0.0, delay=0.0, on_flag=None, schedule=thread_schedule):
+        self.initial_ns = int(initial * NS_PER_SECOND)
+        self.increment_ns = int(increment * NS_PER_SECOND)
+        self.delay_ns = int(delay * NS_PER_SECOND)
+        self.on_flag = on_flag
+        self.schedule = schedule
+        self.lock = threading.RLock()
+        self.cancel_deadline = None
+        self.deadline_token = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Stop the clock and give both sides the base time again.
+        """
+        with self.lock:
+            self._disarm()
+            self.stored_ns = {chess.WHITE: self.initial_ns, chess.BLACK: self.initial_ns}
+            self.running = None
+            self.started_ns = 0
+            self.flagged = None
+
+    def _used_ns(self, now):
+        return max(0, now - self.started_ns - self.delay_ns)
+
+    def remaining_ns(self, color):
+        with self.lock:
+            stored = self.stored_ns[color]
+            if color == self.running:
+                stored -= self._used_ns(time.monotonic_ns())
+            return max(0, stored)
+
+    def remaining(self, color):
+        """
+        Seconds left on color's clock.
+        """
+        return self.remaining_ns(color) / NS_PER_SECOND
+
+    def set_remaining(self, color, seconds):
+        with self.lock:
+            self.stored_ns[color] = int(seconds * NS_PER_SECOND)
+            if color == self.running:
+                self.started_ns = time.monotonic_ns()
+                self._arm()
+
+    def start(self, color):
+        """
+        Run color's clock (stopping the other side's without an increment).
+        Does nothing once a side has flagged.
+        """
+        with self.lock:
+            if self.flagged is not None:
+                return
+            self._charge()
+            self.running = color
+            self.started_ns = time.monotonic_ns()
+            self._arm()
+
+    def press(self):
+        """
+        The side to move has moved: charge its time, add the increment and
+        start the opponent's clock.
+        """
+        with self.lock:
+            color = self.running
+            if color is None or self.flagged is not None:
+                return
+            self._charge()
+            self.stored_ns[color] += self.increment_ns
+            self.running = not color
+            self.started_ns = time.monotonic_ns()
+            self._arm()
+
+    def stop(self):
+        """
+        Pause the clock; start() resumes it.
+        """
+        with self.lock:
+            self._charge()
+            self.running = None
+            self._disarm()
+
+    def _charge(self):
+        if self.running is not None:
+            self.stored_ns[self.running] -= self._used_ns(time.monotonic_ns())
+
+    def _disarm(self):
+        self.deadline_token += 1
+        if self.cancel_deadline is not None:
+            self.cancel_deadline()
+            self.cancel_deadline = None
+
+    def _arm(self):
+        self._disarm()
+        if self.running is None:
+            return
+        token = self.deadline_token
+        deadline = self.started_ns + self.delay_ns + max(0, self.stored_ns[self.running])
+        seconds = max(0, deadline - time.monotonic_ns()) / NS_PER_SECOND
+        self.cancel_deadline = self.schedule(seconds, lambda: self._on_deadline(token))
+
+    def _on_deadline(self, token):
+        with self.lock:
+            if token != self.deadline_token or self.running is None:
+                return  # Superseded by a later start, press or stop.
+            color = self.running
+            if self.remaining_ns(color) > 0:
+                # Woken a little early; wait for the rest.
+                self._arm()
+                return
+            self.stored_ns[color] = 0
+            self.running = None
+            self.flagged = color
+            self.cancel_deadline = None
+        if self.on_flag is not None:
+            self.on_flag(color)
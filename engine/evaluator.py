@@ -0,0 +1,355 @@
+import chess
+
+# Material values in centipawns (middlegame; the search also uses these for
+# capture margins and move ordering).
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0  # King has no material value
+}
+
+# Material in the endgame: pawns and rooks gain, minor pieces lose a little.
+ENDGAME_PIECE_VALUES = {
+    chess.PAWN: 120,
+    chess.KNIGHT: 300,
+    chess.BISHOP: 320,
+    chess.ROOK: 520,
+    chess.QUEEN: 920,
+    chess.KING: 0,
+}
+
+# Middlegame piece-square tables from White's point of view, written rank 8
+# first so they read like a diagram (Simplified Evaluation Function values).
+PAWN_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+ROOK_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+]
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+]
+
+# Endgame tables differ only for pawns (push them) and the king (centralize).
+PAWN_ENDGAME_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     80,  80,  80,  80,  80,  80,  80,  80,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     30,  30,  30,  30,  30,  30,  30,  30,
+     15,  15,  15,  15,  15,  15,  15,  15,
+      5,   5,   5,   5,   5,   5,   5,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0,
+]
+KING_ENDGAME_TABLE = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+
+MIDGAME_TABLES = {
+    chess.PAWN: PAWN_TABLE,
+    chess.KNIGHT: KNIGHT_TABLE,
+    chess.BISHOP: BISHOP_TABLE,
+    chess.ROOK: ROOK_TABLE,
+    chess.QUEEN: QUEEN_TABLE,
+    chess.KING: KING_TABLE,
+}
+ENDGAME_TABLES = dict(MIDGAME_TABLES)
+ENDGAME_TABLES[chess.PAWN] = PAWN_ENDGAME_TABLE
+ENDGAME_TABLES[chess.KING] = KING_ENDGAME_TABLE
+
+# Game phase: TOTAL_PHASE with all minor and major pieces on the board, 0
+# with only kings and pawns. Scores are blended between the middlegame and
+# endgame values by it (a "tapered" evaluation).
+PHASE_WEIGHTS = [0, 0, 1, 1, 2, 4, 0]
+TOTAL_PHASE = 24
+
+
+def _piece_square(values, tables):
+    # [color][piece_type][square]: material plus table bonus, signed so White
+    # is positive. Index 0 of piece_type is unused.
+    result = [[[0] * 64 for _ in range(7)] for _ in chess.COLORS]
+    for piece_type, table in tables.items():
+        for square in chess.SQUARES:
+            # The tables are laid out rank 8 first, so a1 is entry 56 for White;
+            # Black reads the same table vertically mirrored.
+            result[chess.WHITE][piece_type][square] = values[piece_type] + table[square ^ 56]
+            result[chess.BLACK][piece_type][square] = -(values[piece_type] + table[square])
+    return result
+
+
+PIECE_SQUARE_MG = _piece_square(PIECE_VALUES, MIDGAME_TABLES)
+PIECE_SQUARE_EG = _piece_square(ENDGAME_PIECE_VALUES, ENDGAME_TABLES)
+
+# Mobility: (middlegame, endgame) bonus per square attacked by a side's
+# knights, bishops, rooks or queens and not occupied by its own pieces. Each
+# piece type counts the union of its pieces' attacks.
+KNIGHT_MOBILITY = (4, 4)
+BISHOP_MOBILITY = (5, 5)
+ROOK_MOBILITY = (2, 4)
+QUEEN_MOBILITY = (1, 2)
+
+# Pawn structure (middlegame, endgame): per doubled (extra pawn on a file)
+# and isolated pawn, and passed pawn bonuses by rank counted from the pawn's
+# own side (index 1 is its starting rank).
+DOUBLED_PAWN = (-10, -20)
+ISOLATED_PAWN = (-10, -15)
+PASSED_PAWN_MG = [0, 5, 10, 15, 25, 40, 60, 0]
+PASSED_PAWN_EG = [0, 10, 20, 35, 60, 90, 130, 0]
+
+# The bitboard helpers below only use &, |, ^ and shifts by non-negative
+# amounts, so they work the same on Python ints and on NumPy uint64 arrays;
+# engine.batch_eval runs them over many positions at once. They never update
+# a value in place (x |= ...), which would modify the caller's array.
+BB_ALL = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = BB_ALL ^ FILE_A
+NOT_FILE_H = BB_ALL ^ FILE_H
+NOT_FILE_AB = BB_ALL ^ (FILE_A | FILE_A << 1)
+NOT_FILE_GH = BB_ALL ^ (FILE_H | FILE_H >> 1)
+RANKS = [0xFF << (8 * rank) for rank in range(8)]
+
+# (shift, wrap mask) per sliding direction; a positive shift moves up the board.
+ORTHOGONAL_DIRECTIONS = [(8, BB_ALL), (-8, BB_ALL), (1, NOT_FILE_A), (-1, NOT_FILE_H)]
+DIAGONAL_DIRECTIONS = [(9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H)]
+
+
+def popcount(bb):
+    return bb.bit_count()
+
+
+def shift(bb, amount):
+    return (bb << amount) & BB_ALL if amount > 0 else bb >> -amount
+
+
+def north_fill(bb):
+    bb = bb | ((bb << 8) & BB_ALL)
+    bb = bb | ((bb << 16) & BB_ALL)
+    return bb | ((bb << 32) & BB_ALL)
+
+
+def south_fill(bb):
+    bb = bb | (bb >> 8)
+    bb = bb | (bb >> 16)
+    return bb | (bb >> 32)
+
+
+def knight_attacks(knights):
+    """
+    Squares attacked by any knight in the set.
+    """
+    one = ((knights >> 1) & NOT_FILE_H) | ((knights << 1) & NOT_FILE_A)
+    two = ((knights >> 2) & NOT_FILE_GH) | ((knights << 2) & NOT_FILE_AB)
+    return ((one << 16) | (one >> 16) | (two << 8) | (two >> 8)) & BB_ALL
+
+
+def slider_attacks(sliders, empty, directions):
+    """
+    Squares attacked by any slider in the set along the given directions,
+    using Kogge-Stone occluded fills (a ray stops at the first occupied square).
+    """
+    attacks = 0
+    for amount, mask in directions:
+        propagator = empty & mask
+        generator = sliders | (propagator & shift(sliders, amount))
+        propagator = propagator & shift(propagator, amount)
+        generator = generator | (propagator & shift(generator, 2 * amount))
+        propagator = propagator & shift(propagator, 2 * amount)
+        generator = generator | (propagator & shift(generator, 4 * amount))
+        attacks = attacks | (shift(generator, amount) & mask)
+    return attacks
+
+
+def mobility(knights, bishops, rooks, queens, own, occupied, count=popcount):
+    """
+    (middlegame, endgame) mobility bonus for one side's pieces.
+    """
+    empty = BB_ALL ^ occupied
+    targets = BB_ALL ^ own
+    knight = count(knight_attacks(knights) & targets)
+    bishop = count(slider_attacks(bishops, empty, DIAGONAL_DIRECTIONS) & targets)
+    rook = count(slider_attacks(rooks, empty, ORTHOGONAL_DIRECTIONS) & targets)
+    queen = count((slider_attacks(queens, empty, DIAGONAL_DIRECTIONS)
+                   | slider_attacks(queens, empty, ORTHOGONAL_DIRECTIONS)) & targets)
+    return (knight * KNIGHT_MOBILITY[0] + bishop * BISHOP_MOBILITY[0]
+            + rook * ROOK_MOBILITY[0] + queen * QUEEN_MOBILITY[0],
+            knight * KNIGHT_MOBILITY[1] + bishop * BISHOP_MOBILITY[1]
+            + rook * ROOK_MOBILITY[1] + queen * QUEEN_MOBILITY[1])
+
+
+# (piece type, (middlegame, endgame) weight) in the order mobility() counts them.
+MOBILITY_WEIGHTS = [
+    (chess.KNIGHT, KNIGHT_MOBILITY),
+    (chess.BISHOP, BISHOP_MOBILITY),
+    (chess.ROOK, ROOK_MOBILITY),
+    (chess.QUEEN, QUEEN_MOBILITY),
+]
+
+
+def board_mobility(board, color):
+    """
+    Same value as mobility() for one side of a chess.Board, using
+    python-chess's attack tables, which is faster for a single position.
+    """
+    targets = ~board.occupied_co[color]
+    mg = eg = 0
+    for piece_type, (mg_weight, eg_weight) in MOBILITY_WEIGHTS:
+        attacks = 0
+        for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+            attacks |= board.attacks_mask(square)
+        squares = (attacks & targets).bit_count()
+        mg += squares * mg_weight
+        eg += squares * eg_weight
+    return mg, eg
+
+
+def _pawn_terms(pawns, enemy_pawns, forward_fill, backward_fill, step_back, ranks, count):
+    # Doubled: pawns with a friendly pawn behind them on the same file.
+    doubled = count(pawns & forward_fill(shift(pawns, -step_back)))
+    files = forward_fill(backward_fill(pawns))
+    isolated = count(pawns & (BB_ALL ^ ((shift(files, 1) & NOT_FILE_A) | (shift(files, -1) & NOT_FILE_H))))
+    # Passed: no enemy pawn ahead on the same or an adjacent file.
+    enemy_front = backward_fill(shift(enemy_pawns, step_back))
+    blocked = enemy_front | (shift(enemy_front, 1) & NOT_FILE_A) | (shift(enemy_front, -1) & NOT_FILE_H)
+    passed = pawns & (BB_ALL ^ blocked)
+    mg = doubled * DOUBLED_PAWN[0] + isolated * ISOLATED_PAWN[0]
+    eg = doubled * DOUBLED_PAWN[1] + isolated * ISOLATED_PAWN[1]
+    for relative_rank in range(1, 7):
+        on_rank = count(passed & RANKS[ranks[relative_rank]])
+        mg = mg + on_rank * PASSED_PAWN_MG[relative_rank]
+        eg = eg + on_rank * PASSED_PAWN_EG[relative_rank]
+    return mg, eg
+
+
+def pawn_structure(white_pawns, black_pawns, count=popcount):
+    """
+    (middlegame, endgame) pawn structure score, positive when it favors White:
+    doubled, isolated and passed pawns.
+    """
+    white_mg, white_eg = _pawn_terms(white_pawns, black_pawns, north_fill, south_fill, -8, range(8), count)
+    black_mg, black_eg = _pawn_terms(black_pawns, white_pawns, south_fill, north_fill, 8, range(7, -1, -1), count)
+    return white_mg - black_mg, white_eg - black_eg
+
+
+def taper(mg, eg, phase):
+    """
+    Blend middlegame and endgame scores by game phase (0..TOTAL_PHASE).
+    """
+    return (mg * phase + eg * (TOTAL_PHASE - phase)) // TOTAL_PHASE
+
+
+def psq_scores(board):
+    """
+    (middlegame, endgame, phase) material plus piece-square scores of a
+    position, computed from the piece bitboards. Scores are positive when
+    they favor White.
+    """
+    mg = eg = phase = 0
+    for color in chess.COLORS:
+        occupied = board.occupied_co[color]
+        for piece_type in chess.PIECE_TYPES:
+            mg_table = PIECE_SQUARE_MG[color][piece_type]
+            eg_table = PIECE_SQUARE_EG[color][piece_type]
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color) & occupied):
+                mg += mg_table[square]
+                eg += eg_table[square]
+                phase += PHASE_WEIGHTS[piece_type]
+    return mg, eg, phase
+
+
+def evaluate(board, pawn_table=None):
+    """
+    Evaluate the board state and return a score in centipawns.
+    Positive score favors White, negative score favors Black.
+
+    Material and piece-square values are tapered between middlegame and
+    endgame tables by the remaining material; mobility and pawn structure
+    are added on top. A Position keeps the piece-square part up to date on
+    push/pop; any other board is scored from its bitboards. For a Position,
+    pawn structure scores are looked up in (and added to) pawn_table, an
+    engine.pawn_hash.PawnHashTable, when one is given.
+    """
+    mg = getattr(board, 'psq_mg', None)
+    if mg is None:
+        mg, eg, phase = psq_scores(board)
+    else:
+        eg, phase = board.psq_eg, board.phase
+
+    pawn_key = getattr(board, 'pawn_key', None)
+    if pawn_table is None or pawn_key is None:
+        pawn_mg, pawn_eg = pawn_structure(board.pawns & board.occupied_co[chess.WHITE],
+                                          board.pawns & board.occupied_co[chess.BLACK])
+    else:
+        entry = pawn_table.probe(pawn_key)
+        if entry is None:
+            entry = pawn_structure(board.pawns & board.occupied_co[chess.WHITE],
+                                   board.pawns & board.occupied_co[chess.BLACK])
+            pawn_table.store(pawn_key, *entry)
+        pawn_mg, pawn_eg = entry
+    white_mg, white_eg = board_mobility(board, chess.WHITE)
+    black_mg, black_eg = board_mobility(board, chess.BLACK)
+
+    mg += pawn_mg + white_mg - black_mg
+    eg += pawn_eg + white_eg - black_eg
+    return taper(mg, eg, min(phase, TOTAL_PHASE))
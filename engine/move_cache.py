@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from engine.zobrist import zobrist_hash
+
+
+class LegalMoveCache:
+    """
+    Legal moves of recently seen positions, grouped by from-square and keyed
+    by Zobrist hash. Highlighting, move validation and game-over detection
+    all read the same entry, so each position generates its moves once.
+    A push or pop changes the key, so stale entries are never returned; the
+    least recently used position is dropped once max_positions are cached.
+    """
+
+    def __init__(self, max_positions=64):
+        self.max_positions = max_positions
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+
+    def moves_by_square(self, board):
+        """
+        Return {from_square: [moves]} for the board's legal moves.
+        """
+        key = zobrist_hash(board)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = {}
+        for move in board.generate_legal_moves():
+            entry.setdefault(move.from_square, []).append(move)
+        self.entries[key] = entry
+        if len(self.entries) > self.max_positions:
+            self.entries.popitem(last=False)
+        return entry
+
+    def moves_from(self, board, square):
+        return self.moves_by_square(board).get(square, [])
+
+    def is_legal(self, board, move):
+        return move in self.moves_from(board, move.from_square)
+
+    def has_legal_moves(self, board):
+        return bool(self.moves_by_square(board))
@@ -0,0 +1,86 @@
+import chess
+
+# Piece values used only for MVV-LVA ordering (king as attacker is cheapest to risk last).
+ORDER_VALUES = [0, 1, 3, 3, 5, 9, 20]
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORES = (1 << 23, (1 << 23) - 1)
+HISTORY_LIMIT = 1 << 20
+
+MAX_PLY = 128
+
+
+def mvv_lva(board, move):
+    """
+    Most-valuable-victim / least-valuable-attacker score for a capture or promotion.
+    """
+    victim = board.piece_type_at(move.to_square)
+    if victim is None and board.ep_square == move.to_square and board.pawns & chess.BB_SQUARES[move.from_square]:
+        victim = chess.PAWN
+    attacker = board.piece_type_at(move.from_square)
+    score = ORDER_VALUES[victim or 0] * 10 - ORDER_VALUES[attacker]
+    if move.promotion:
+        score += ORDER_VALUES[move.promotion] * 10
+    return score
+
+
+class MoveOrderer:
+    """
+    Orders moves for alpha-beta: hash move, captures by MVV-LVA, two killer
+    moves per ply, then quiet moves by history score.
+    """
+
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * 4096, [0] * 4096]
+
+    def clear(self):
+        self.__init__()
+
+    def is_quiet(self, board, move):
+        return not move.promotion and not board.is_capture(move)
+
+    def order(self, board, moves, ply, hash_move=None):
+        """
+        Return moves sorted best first.
+        """
+        killer1, killer2 = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history[board.turn]
+        occupied_them = board.occupied_co[not board.turn]
+        ep_square = board.ep_square
+        pawns = board.pawns
+
+        def score(move):
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            to_square = move.to_square
+            if move.promotion or occupied_them & chess.BB_SQUARES[to_square] or (
+                    to_square == ep_square and pawns & chess.BB_SQUARES[move.from_square]):
+                return CAPTURE_SCORE + mvv_lva(board, move)
+            if move == killer1:
+                return KILLER_SCORES[0]
+            if move == killer2:
+                return KILLER_SCORES[1]
+            return history[move.from_square * 64 + to_square]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def record_cutoff(self, board, move, ply, depth):
+        """
+        Update killers and history after a quiet move caused a beta cutoff.
+        """
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+        history = self.history[board.turn]
+        index = move.from_square * 64 + move.to_square
+        history[index] += depth * depth
+        if history[index] >= HISTORY_LIMIT:
+            # Keep history below killer scores by halving both tables.
+            for table in self.history:
+                for i in range(4096):
+                    table[i] >>= 1
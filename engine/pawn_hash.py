@@ -0,0 +1,75 @@
+from array import array
+
+# Each entry is one 64-bit pawn key plus one 64-bit word holding both scores.
+ENTRY_BYTES = 16
+
+_SCORE_BIAS = 1 << 31
+
+
+class PawnHashTable:
+    """
+    Fixed-size cache of pawn-structure scores keyed by the pawn-only Zobrist
+    key (see engine.zobrist.pawn_hash). Pawn moves are rare compared with
+    other moves, so most nodes of a search, and of the following searches
+    in a game, reuse an entry instead of recomputing the pawn terms.
+
+    The table is direct-mapped: each key has one slot and a new entry
+    replaces whatever was there.
+    """
+
+    def __init__(self, size_mb=1):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """
+        Reallocate the table for *size_mb* megabytes. Clears all entries.
+        """
+        self.size_mb = size_mb
+        self.size = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.keys = array('Q', bytes(8 * self.size))
+        self.data = array('Q', bytes(8 * self.size))
+        self.reset_stats()
+
+    def clear(self):
+        """
+        Drop all entries but keep the allocated size.
+        """
+        self.resize(self.size_mb)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def probe(self, key):
+        """
+        Look up *key*. Returns (middlegame, endgame) or None on a miss.
+        """
+        index = key % self.size
+        data = self.data[index]
+        if not data or self.keys[index] != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return (data >> 32) - _SCORE_BIAS, (data & 0xFFFFFFFF) - _SCORE_BIAS
+
+    def store(self, key, mg, eg):
+        index = key % self.size
+        if self.data[index] and self.keys[index] != key:
+            self.collisions += 1
+        self.keys[index] = key
+        self.data[index] = ((mg + _SCORE_BIAS) << 32) | (eg + _SCORE_BIAS)
+
+    def stats(self):
+        """
+        Return hit/miss/collision counters as a dict.
+        """
+        probes = self.hits + self.misses
+        return {
+            'size_mb': self.size_mb,
+            'entries': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
@@ -0,0 +1,127 @@
+import chess
+from engine.evaluator import PHASE_WEIGHTS, PIECE_SQUARE_EG, PIECE_SQUARE_MG, psq_scores
+from engine.zobrist import PIECE_KEYS, SIDE_KEY, castling_key, ep_key, pawn_hash, zobrist_hash
+
+
+def piece_changes(board, move):
+    """
+    List the piece placements *move* changes as (added, color, piece_type, square)
+    tuples. Must be called before the move is pushed; handles captures,
+    en passant, promotion and castling.
+    """
+    from_square = move.from_square
+    to_square = move.to_square
+    color = board.turn
+    piece_type = board.piece_type_at(from_square)
+
+    if piece_type == chess.KING and (
+            board.occupied_co[color] & chess.BB_SQUARES[to_square] or
+            abs(to_square - from_square) == 2):
+        # Castling: python-chess encodes it as e1g1 (or king-takes-rook in 960).
+        rank_base = from_square & ~7
+        if to_square > from_square:
+            rook_from = to_square if board.rooks & chess.BB_SQUARES[to_square] else rank_base + 7
+            king_to, rook_to = rank_base + 6, rank_base + 5
+        else:
+            rook_from = to_square if board.rooks & chess.BB_SQUARES[to_square] else rank_base
+            king_to, rook_to = rank_base + 2, rank_base + 3
+        return [
+            (False, color, chess.KING, from_square),
+            (False, color, chess.ROOK, rook_from),
+            (True, color, chess.KING, king_to),
+            (True, color, chess.ROOK, rook_to),
+        ]
+
+    changes = [(False, color, piece_type, from_square), (True, color, move.promotion or piece_type, to_square)]
+    captured = board.piece_type_at(to_square)
+    if captured:
+        changes.append((False, not color, captured, to_square))
+    elif piece_type == chess.PAWN and to_square == board.ep_square and (to_square - from_square) & 7:
+        capture_square = to_square - 8 if color == chess.WHITE else to_square + 8
+        changes.append((False, not color, chess.PAWN, capture_square))
+    return changes
+
+
+class Position(chess.Board):
+    """
+    A chess.Board that keeps its Zobrist key, pawn-only key, middlegame and
+    endgame material/piece-square scores and game phase up to date on
+    push/pop. The search converts the caller's board into a Position once at
+    the root, so every node can read `position.zobrist`, `position.pawn_key`,
+    `position.psq_mg`, `position.psq_eg` and `position.phase` without
+    rescanning the board.
+    """
+
+    def __init__(self, fen=chess.STARTING_FEN, *, chess960=False):
+        self._incremental_stack = []
+        self.zobrist = 0
+        self.pawn_key = 0
+        self.psq_mg = 0
+        self.psq_eg = 0
+        self.phase = 0
+        super().__init__(fen, chess960=chess960)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a Position from any chess.Board, replaying its move stack so
+        repetition detection and pop() keep working.
+        """
+        position = cls(board.root().fen(), chess960=board.chess960)
+        for move in board.move_stack:
+            position.push(move)
+        return position
+
+    def clear_stack(self):
+        super().clear_stack()
+        self._incremental_stack = []
+        self.zobrist = zobrist_hash(self)
+        self.pawn_key = pawn_hash(self)
+        self.psq_mg, self.psq_eg, self.phase = psq_scores(self)
+
+    def push(self, move):
+        key = self.zobrist ^ castling_key(self.castling_rights) ^ ep_key(self.ep_square) ^ SIDE_KEY
+        pawn_key = self.pawn_key
+        mg, eg, phase = self.psq_mg, self.psq_eg, self.phase
+        if move:
+            for added, color, piece_type, square in piece_changes(self, move):
+                key ^= PIECE_KEYS[color][piece_type][square]
+                if piece_type == chess.PAWN:
+                    pawn_key ^= PIECE_KEYS[color][chess.PAWN][square]
+                if added:
+                    mg += PIECE_SQUARE_MG[color][piece_type][square]
+                    eg += PIECE_SQUARE_EG[color][piece_type][square]
+                    phase += PHASE_WEIGHTS[piece_type]
+                else:
+                    mg -= PIECE_SQUARE_MG[color][piece_type][square]
+                    eg -= PIECE_SQUARE_EG[color][piece_type][square]
+                    phase -= PHASE_WEIGHTS[piece_type]
+        self._incremental_stack.append((self.zobrist, self.pawn_key, self.psq_mg, self.psq_eg, self.phase))
+        super().push(move)
+        self.zobrist = key ^ castling_key(self.castling_rights) ^ ep_key(self.ep_square)
+        self.pawn_key = pawn_key
+        self.psq_mg, self.psq_eg, self.phase = mg, eg, phase
+
+    def pop(self):
+        move = super().pop()
+        self.zobrist, self.pawn_key, self.psq_mg, self.psq_eg, self.phase = self._incremental_stack.pop()
+        return move
+
+    def root(self):
+        board = super().root()
+        board.clear_stack()
+        return board
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board.zobrist = self.zobrist
+        board.pawn_key = self.pawn_key
+        board.psq_mg = self.psq_mg
+        board.psq_eg = self.psq_eg
+        board.phase = self.phase
+        if stack:
+            stack = len(self.move_stack) if stack is True else stack
+            board._incremental_stack = self._incremental_stack[-stack:] if stack else []
+        else:
+            board._incremental_stack = []
+        return board
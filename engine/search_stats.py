@@ -0,0 +1,215 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+import chess
+
+# Attribution categories for profile_breakdown, in report order.
+CATEGORIES = ('move generation', 'make/unmake', 'evaluation', 'search', 'other')
+
+# python-chess functions that apply or take back a move rather than generate one.
+_MAKE_UNMAKE = {'push', 'pop', '_push_capture', '_set_piece_at', '_remove_piece_at', '_board_state',
+                '_restore', 'restore'}
+_EVALUATION = {'evaluate_board', 'evaluate', 'psq_scores'}
+_SEARCH_FILES = ('ai.py', 'move_ordering.py', 'transposition.py', 'bitbase.py')
+
+# Frames from python-chess are recognised by this directory, not by "chess"
+# appearing in the path (which would also match this repository's own files).
+_CHESS_DIR = os.path.dirname(os.path.abspath(chess.__file__)) + os.sep
+
+
+class SearchStatistics:
+    """
+    Opt-in statistics for one search. Pass an instance to
+    ai.iterative_deepening (or find_best_move) and it records one row per
+    completed iteration: nodes, time, effective branching factor, cutoff
+    and transposition table hit rates. It also keeps histograms of nodes
+    per ply and of the move index that caused each beta cutoff. Without
+    one, the search pays a single None check per node.
+    """
+
+    def __init__(self):
+        self.iterations = []
+        self.nodes_by_ply = Counter()
+        self.cutoffs_by_index = Counter()
+        self.start = None
+        self.tt = None
+        self.tt_base = (0, 0)
+        self.counter_base = (0, 0, 0, 0)
+
+    def begin(self, tt):
+        self.start = time.perf_counter()
+        self.tt = tt
+        self.tt_base = (tt.hits, tt.misses) if tt is not None else (0, 0)
+        self.counter_base = (0, 0, 0, 0)
+
+    def record_iteration(self, depth, state, score, move):
+        """
+        Called by iterative_deepening after each completed iteration with
+        the SearchState's cumulative counters; the row holds this
+        iteration's share of them.
+        """
+        previous = self.iterations[-1] if self.iterations else None
+        nodes = state.nodes - (previous['total_nodes'] if previous else 0)
+        hits = misses = 0
+        if self.tt is not None:
+            hits = self.tt.hits - self.tt_base[0]
+            misses = self.tt.misses - self.tt_base[1]
+            self.tt_base = (self.tt.hits, self.tt.misses)
+        counters = (state.qnodes, state.cutoffs, state.first_move_cutoffs, state.researches)
+        qnodes, cutoffs, first_move_cutoffs, researches = (
+            now - base for now, base in zip(counters, self.counter_base))
+        self.counter_base = counters
+        elapsed = time.perf_counter() - self.start
+        self.iterations.append({
+            'depth': depth,
+            'move': move.uci() if move else None,
+            'score': score,
+            'nodes': nodes,
+            'total_nodes': state.nodes,
+            'qnodes': qnodes,
+            'seconds': elapsed - (previous['total_seconds'] if previous else 0.0),
+            'total_seconds': elapsed,
+            'branching_factor': nodes / previous['nodes'] if previous and previous['nodes'] else None,
+            'cutoffs': cutoffs,
+            'first_move_cutoff_rate': first_move_cutoffs / cutoffs if cutoffs else 0.0,
+            'researches': researches,
+            'tt_hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        })
+
+    def summary(self):
+        return {
+            'iterations': self.iterations,
+            'nodes_by_ply': dict(sorted(self.nodes_by_ply.items())),
+            'cutoffs_by_index': dict(sorted(self.cutoffs_by_index.items())),
+        }
+
+    def dump(self, path):
+        """
+        Write the summary as JSON.
+        """
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.summary(), handle, indent=2)
+
+    def format(self):
+        lines = [f"{'depth':>5} {'nodes':>9} {'sec':>7} {'nps':>8} {'ebf':>5} {'1st-cut':>7} {'tt-hit':>6}  move  score"]
+        for row in self.iterations:
+            nps = row['nodes'] / row['seconds'] if row['seconds'] else 0.0
+            ebf = f"{row['branching_factor']:.2f}" if row['branching_factor'] else '-'
+            lines.append(f"{row['depth']:>5} {row['nodes']:>9} {row['seconds']:>7.2f} {nps:>8.0f} {ebf:>5} "
+                         f"{100 * row['first_move_cutoff_rate']:>6.1f}% {100 * row['tt_hit_rate']:>5.1f}%  "
+                         f"{row['move'] or '-':5} {row['score']}")
+        cutoffs = sum(self.cutoffs_by_index.values())
+        if cutoffs:
+            shares = ', '.join(f"#{index + 1} {100 * count / cutoffs:.1f}%"
+                               for index, count in sorted(self.cutoffs_by_index.items())[:5])
+            lines.append(f"cutoffs by move index: {shares}")
+        return '\n'.join(lines)
+
+
+def profile_call(function, *args, **kwargs):
+    """
+    Run function under cProfile. Returns (result, pstats.Stats).
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+    return result, pstats.Stats(profiler)
+
+
+def _category(filename, name):
+    base = os.path.basename(filename)
+    if name in _EVALUATION or base in ('evaluator.py', 'pawn_hash.py'):
+        return 'evaluation'
+    in_chess = os.path.abspath(filename).startswith(_CHESS_DIR)
+    if base in ('position.py', 'zobrist.py') or (name in _MAKE_UNMAKE and in_chess):
+        return 'make/unmake'
+    if in_chess:
+        return 'move generation'
+    if base in _SEARCH_FILES:
+        return 'search'
+    return None
+
+
+def profile_breakdown(stats):
+    """
+    Split the self time in a pstats.Stats between CATEGORIES. Built-in
+    functions (bit_length, list.append...) have no file of their own, so
+    their time goes to their callers' categories in proportion to calls.
+    Returns {category: seconds}.
+    """
+    totals = dict.fromkeys(CATEGORIES, 0.0)
+    categories = {}
+    for function in stats.stats:
+        categories[function] = _category(function[0], function[2])
+
+    for function, (_, _, own_time, _, callers) in stats.stats.items():
+        category = categories[function]
+        if category is not None:
+            totals[category] += own_time
+            continue
+        calls = {caller: entry[1] for caller, entry in callers.items() if categories.get(caller)}
+        total_calls = sum(calls.values())
+        if not total_calls:
+            totals['other'] += own_time
+            continue
+        for caller, count in calls.items():
+            totals[categories[caller]] += own_time * count / total_calls
+    return totals
+
+
+def format_breakdown(totals):
+    seconds = sum(totals.values()) or 1.0
+    return '\n'.join(f"{category:16} {totals[category]:>8.2f}s {100 * totals[category] / seconds:>5.1f}%"
+                     for category in CATEGORIES)
+
+
+class StackSampler:
+    """
+    Sampling profiler for flame graphs: a background thread records the
+    call stack of one thread every interval seconds. write_folded() saves
+    the samples in the folded format ("outer;inner;leaf count" per line)
+    read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, thread_id=None, interval=0.001):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            for stack, count in self.samples.most_common():
+                handle.write(f"{stack} {count}\n")
@@ -0,0 +1,132 @@
+import time
+
+# Moves the remaining time is spread over when the time control does not say.
+DEFAULT_MOVES_TO_GO = 30
+
+# Share of the increment spent on top of the base allocation.
+INCREMENT_SHARE = 0.8
+
+# Kept in reserve for communication and scheduling delays (seconds).
+MOVE_OVERHEAD = 0.05
+
+# The hard limit is this many soft budgets, but never more than
+# MAX_HARD_SHARE of the time left.
+HARD_RATIO = 4
+MAX_HARD_SHARE = 0.8
+
+MIN_BUDGET = 0.01
+
+# A deeper iteration is predicted to cost the last one's time times the
+# growth between the last two iterations, kept within these bounds (early
+# iterations are too quick to time reliably). With only one iteration done,
+# DEFAULT_BRANCHING is assumed.
+MIN_BRANCHING = 2.0
+MAX_BRANCHING = 8.0
+DEFAULT_BRANCHING = 4.0
+
+# Score drops (centipawns, side to move) that stretch the soft budget.
+SCORE_DROP_EXTENSIONS = ((100, 2.0), (30, 1.5))
+
+# Added to the soft budget factor each time the best move changes; the
+# bonus halves with every iteration that keeps the same move.
+INSTABILITY_BONUS = 0.5
+
+
+class TimeManager:
+    """
+    Time allocation for one move from the player's clock.
+
+    The soft budget is the time left (minus MOVE_OVERHEAD) divided by the
+    moves to go, plus most of the increment. Iterative deepening asks
+    should_stop() after every iteration: it stops early when the only legal
+    reply has been searched, and otherwise when the next iteration, predicted
+    from how fast the last ones grew, would not finish within the soft
+    budget. The budget is stretched when the score drops or the best move
+    keeps changing. The hard budget bounds the search whatever happens; it
+    becomes the deadline.
+    """
+
+    def __init__(self, remaining, increment=0.0, moves_to_go=None, overhead=MOVE_OVERHEAD):
+        available = max(0.0, remaining - overhead)
+        moves_to_go = max(1, moves_to_go or DEFAULT_MOVES_TO_GO)
+        self.hard = max(MIN_BUDGET, min(available * MAX_HARD_SHARE,
+                                        HARD_RATIO * (available / moves_to_go + increment * INCREMENT_SHARE)))
+        self.soft = max(MIN_BUDGET, min(available / moves_to_go + increment * INCREMENT_SHARE, self.hard))
+        self.start()
+
+    @classmethod
+    def from_clock(cls, clock, color, moves_to_go=None):
+        """
+        Budget for color's move on an engine.clock.GameClock.
+        """
+        return cls(clock.remaining(color), clock.increment_ns / 1e9, moves_to_go)
+
+    def start(self):
+        """
+        Start timing the move (iterative_deepening calls this).
+        """
+        self.started = time.monotonic()
+        self.single_reply = False
+        self.best_move = None
+        self.score = None
+        self.instability = 0.0
+        self.drop_factor = 1.0
+        self.iteration_end = 0.0
+        self.iteration_times = []
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def deadline(self):
+        """
+        Absolute time.monotonic() at which the search must stop.
+        """
+        return self.started + self.hard
+
+    def factor(self):
+        """
+        Current stretch of the soft budget.
+        """
+        return self.drop_factor * (1 + self.instability)
+
+    def update(self, score, best_move):
+        """
+        Record a completed iteration: score (side to move's point of view)
+        and best move.
+        """
+        now = self.elapsed()
+        self.iteration_times = self.iteration_times[-1:] + [now - self.iteration_end]
+        self.iteration_end = now
+        if self.best_move is not None:
+            self.instability /= 2
+            if best_move != self.best_move:
+                self.instability += INSTABILITY_BONUS
+        if self.score is not None:
+            self.drop_factor = 1.0
+            for drop, factor in SCORE_DROP_EXTENSIONS:
+                if score <= self.score - drop:
+                    self.drop_factor = factor
+                    break
+        self.best_move = best_move
+        self.score = score
+
+    def should_stop(self):
+        """
+        True when the search should not start another iteration.
+        """
+        if self.single_reply:
+            return True
+        return self.elapsed() + self.next_iteration_time() > min(self.soft * self.factor(), self.hard)
+
+    def next_iteration_time(self):
+        """
+        Predicted seconds for one more iteration.
+        """
+        if not self.iteration_times:
+            return 0.0
+        last = self.iteration_times[-1]
+        branching = DEFAULT_BRANCHING
+        if len(self.iteration_times) == 2 and self.iteration_times[0] > 0:
+            branching = min(MAX_BRANCHING, max(MIN_BRANCHING, last / self.iteration_times[0]))
+        return last * branching
+
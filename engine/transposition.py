@@ -0,0 +1,162 @@
+from array import array
+import chess
+
+# Bound types stored with each entry.
+EXACT = 0
+LOWER = 1  # Score is a lower bound (the search failed high).
+UPPER = 2  # Score is an upper bound (the search failed low).
+
+# Each entry is one 64-bit key plus one 64-bit packed data word.
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2
+
+_SCORE_BIAS = 1 << 31
+_DEPTH_BIAS = 64
+
+
+def encode_move(move):
+    """
+    Pack a move into 15 bits: from (6), to (6), promotion piece type (3).
+    """
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(packed):
+    """
+    Inverse of encode_move. Returns None for an empty move.
+    """
+    if not packed:
+        return None
+    return chess.Move(packed & 63, (packed >> 6) & 63, (packed >> 12) or None)
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table keyed by Zobrist hash.
+
+    Memory is allocated up front in two flat arrays (keys and packed data),
+    so the table never grows past the requested size. Each bucket has two
+    slots: the first is depth-preferred, the second is always-replace.
+    """
+
+    def __init__(self, size_mb=16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """
+        Reallocate the table for *size_mb* megabytes. Clears all entries.
+        """
+        self.size_mb = size_mb
+        entries = max(SLOTS_PER_BUCKET, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.bucket_count = entries // SLOTS_PER_BUCKET
+        entries = self.bucket_count * SLOTS_PER_BUCKET
+        self.keys = array('Q', bytes(8 * entries))
+        self.data = array('Q', bytes(8 * entries))
+        self.generation = 0
+        self.reset_stats()
+
+    def clear(self):
+        """
+        Drop all entries but keep the allocated size.
+        """
+        self.resize(self.size_mb)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self):
+        """
+        Age the table so entries from earlier searches are replaced first.
+        """
+        self.generation = (self.generation + 1) & 0x3F
+
+    def probe(self, key):
+        """
+        Look up *key*. Returns (depth, flag, score, move) or None on a miss.
+        """
+        index = (key % self.bucket_count) * SLOTS_PER_BUCKET
+        keys = self.keys
+        if keys[index] == key:
+            found = index
+        elif keys[index + 1] == key:
+            found = index + 1
+        else:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        data = self.data[found]
+        return (
+            ((data >> 18) & 0xFF) - _DEPTH_BIAS,
+            (data >> 16) & 0x3,
+            (data >> 32) - _SCORE_BIAS,
+            decode_move(data & 0xFFFF),
+        )
+
+    def store(self, key, depth, flag, score, move=None):
+        """
+        Store a search result. The depth-preferred slot is only overwritten by
+        an equal or deeper search of any position, or by anything once the
+        old entry is from a previous search; otherwise the always-replace slot
+        takes the entry.
+        """
+        index = (key % self.bucket_count) * SLOTS_PER_BUCKET
+        keys = self.keys
+        data = self.data
+
+        old_key = keys[index]
+        old_data = data[index]
+        if (old_key == key or not old_data
+                or ((old_data >> 26) & 0x3F) != self.generation
+                or depth >= ((old_data >> 18) & 0xFF) - _DEPTH_BIAS):
+            slot = index
+        else:
+            slot = index + 1
+            old_key = keys[slot]
+            old_data = data[slot]
+
+        # Keep the old best move when re-storing a position without one.
+        packed_move = encode_move(move)
+        if not packed_move and old_key == key:
+            packed_move = old_data & 0xFFFF
+        elif old_data and old_key != key:
+            self.collisions += 1
+
+        keys[slot] = key
+        data[slot] = (
+            ((int(score) + _SCORE_BIAS) << 32)
+            | (self.generation << 26)
+            | ((max(-_DEPTH_BIAS, min(depth, 255 - _DEPTH_BIAS)) + _DEPTH_BIAS) << 18)
+            | (flag << 16)
+            | packed_move
+        )
+        self.stores += 1
+
+    def hashfull(self):
+        """
+        Permille of slots in use, sampled from the first 1000 slots (UCI style).
+        """
+        sample = min(1000, len(self.data))
+        used = sum(1 for i in range(sample) if self.data[i])
+        return used * 1000 // sample
+
+    def stats(self):
+        """
+        Return hit/miss/collision counters as a dict.
+        """
+        probes = self.hits + self.misses
+        return {
+            'size_mb': self.size_mb,
+            'entries': len(self.keys),
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'hashfull': self.hashfull(),
+        }
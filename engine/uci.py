@@ -0,0 +1,287 @@
+"""
+UCI front end for the engine, for tournament managers and headless use:
+
+    python -m engine.uci
+
+Commands are read on the main thread while searches run on a worker thread,
+so `stop` (or `quit`) interrupts an in-flight search immediately. `go ponder`
+searches until `ponderhit`, after which the same search continues on the
+normal time budget. `go mate N` searches 2N-1 plies, deep enough to find
+a mate in N moves. Malformed or illegal input is reported with `info string`
+and otherwise ignored.
+"""
+
+import sys
+import threading
+import time
+import chess
+import ai
+from engine.time_manager import TimeManager
+
+ENGINE_NAME = "Chess-Engine"
+ENGINE_AUTHOR = "shreeyatamang"
+
+
+def format_info(result, board, elapsed):
+    """
+    Build an `info` line for a completed iteration. Scores are reported from
+    the side to move's point of view, as UCI requires.
+    """
+    score = result.score if board.turn == chess.WHITE else -result.score
+    mate = ai.mate_in(score)
+    score_text = f"cp {score}" if mate is None else f"mate {mate}"
+    millis = max(1, int(elapsed * 1000))
+    return (f"info depth {result.depth} score {score_text} nodes {result.nodes} "
+            f"nps {result.nodes * 1000 // millis} time {millis} "
+            f"hashfull {ai.TRANSPOSITION_TABLE.hashfull()} "
+            f"pv {' '.join(move.uci() for move in result.pv)}")
+
+
+def parse_go(tokens):
+    """
+    Parse the arguments of a `go` command into a dict. Raises ValueError
+    for a non-numeric limit or a malformed move.
+    """
+    params = {"searchmoves": []}
+    numeric = {"wtime", "btime", "winc", "binc", "movestogo", "depth", "nodes", "movetime", "mate"}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in numeric and i + 1 < len(tokens):
+            params[token] = int(tokens[i + 1])
+            i += 2
+        elif token in ("infinite", "ponder"):
+            params[token] = True
+            i += 1
+        elif token == "searchmoves":
+            i += 1
+            while i < len(tokens) and tokens[i] not in numeric and tokens[i] not in ("infinite", "ponder"):
+                params["searchmoves"].append(chess.Move.from_uci(tokens[i]))
+                i += 1
+        else:
+            i += 1
+    return params
+
+
+def max_depth_for(params):
+    """
+    Depth limit of a `go` command: its depth, capped for `go mate N` at the
+    2N-1 plies a mate in N moves needs.
+    """
+    depth = params.get("depth", ai.MAX_DEPTH)
+    if "mate" in params:
+        depth = min(depth, max(1, 2 * params["mate"] - 1))
+    return max(1, depth)
+
+
+def time_manager_for(params, turn):
+    """
+    TimeManager for the side to move's clock in `go` params, or None when the
+    search has no clock (infinite, or a fixed movetime).
+    """
+    remaining = params.get("wtime" if turn == chess.WHITE else "btime")
+    if remaining is None or params.get("infinite") or "movetime" in params:
+        return None
+    increment = params.get("winc" if turn == chess.WHITE else "binc", 0)
+    return TimeManager(remaining / 1000, increment / 1000, params.get("movestogo"))
+
+
+def time_for_move(params, turn):
+    """
+    Seconds to spend on this move, or None to search without a clock.
+    """
+    if "movetime" in params:
+        return params["movetime"] / 1000
+    manager = time_manager_for(params, turn)
+    return manager.soft if manager is not None else None
+
+
+class UCIEngine:
+    """
+    State of one UCI session: the current position and the running search.
+    """
+
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.board = chess.Board()
+        self.search_thread = None
+        self.stop_event = None
+        # Set when bestmove may be sent: at once for timed searches, on
+        # stop/ponderhit for infinite and ponder searches.
+        self.release_event = None
+        self.go_params = None
+        self.ponder_timer = None
+        self.own_book = True
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """
+        Process one command line. Returns False when the session should end.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        try:
+            return self.dispatch(command, args)
+        except ValueError as error:
+            # Bad input from the GUI must not end the session.
+            self.send(f"info string ignoring {line!r}: {error}")
+            return True
+
+    def dispatch(self, command, args):
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {ai.DEFAULT_HASH_MB} min 1 max 4096")
+            self.send("option name OwnBook type check default true")
+            self.send(f"option name BookFile type string default {ai.OPENING_BOOK.path}")
+            self.send(f"option name BitbaseDir type string default {ai.BITBASES.directory}")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            ai.TRANSPOSITION_TABLE.clear()
+            ai.PAWN_HASH_TABLE.clear()
+            self.board = chess.Board()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.go(parse_go(args))
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        return True
+
+    def set_option(self, args):
+        # setoption name <id> [value <x>]
+        text = " ".join(args)
+        if not text.startswith("name "):
+            return
+        name, _, value = text[5:].partition(" value ")
+        name, value = name.strip().lower(), value.strip()
+        if name == "hash" and value.isdigit():
+            ai.set_hash_size(int(value))
+        elif name == "ownbook":
+            self.own_book = value.lower() == "true"
+        elif name == "bookfile":
+            ai.set_book_path(value or None)
+        elif name == "bitbasedir":
+            ai.set_bitbase_dir(value or None)
+
+    def set_position(self, args):
+        if not args:
+            return
+        if args[0] == "startpos":
+            board = chess.Board()
+            rest = args[1:]
+        elif args[0] == "fen":
+            fen_end = args.index("moves") if "moves" in args else len(args)
+            board = chess.Board(" ".join(args[1:fen_end]))
+            rest = args[fen_end:]
+        else:
+            return
+        if rest and rest[0] == "moves":
+            for uci in rest[1:]:
+                board.push_uci(uci)
+        self.board = board
+
+    def go(self, params):
+        self.stop()
+        board = self.board.copy()
+        self.go_params = params
+        self.stop_event = threading.Event()
+        self.release_event = threading.Event()
+        if not params.get("infinite") and not params.get("ponder"):
+            self.release_event.set()
+        self.search_thread = threading.Thread(
+            target=self.search, args=(board, params, self.stop_event, self.release_event), daemon=True)
+        self.search_thread.start()
+
+    def ponderhit(self):
+        """
+        The opponent played the pondered move: keep the running search and
+        give it the time this move would normally get.
+        """
+        if self.search_thread is None or not self.go_params.get("ponder"):
+            return
+        budget = time_for_move(self.go_params, self.board.turn)
+        if budget is not None:
+            self.ponder_timer = threading.Timer(budget, self.stop_event.set)
+            self.ponder_timer.daemon = True
+            self.ponder_timer.start()
+        self.release_event.set()
+
+    def search(self, board, params, stop_event, release_event):
+        """
+        Worker thread: run the search and report `info` lines and `bestmove`.
+        """
+        start = time.monotonic()
+        root_moves = params["searchmoves"] or None
+        infinite = params.get("infinite") or params.get("ponder")
+        if self.own_book and not infinite and root_moves is None:
+            book_move = ai.OPENING_BOOK.move(board)
+            if book_move is not None:
+                self.send(f"bestmove {book_move.uci()}")
+                return
+        result = ai.iterative_deepening(
+            board,
+            max_depth=max_depth_for(params),
+            time_limit=params["movetime"] / 1000 if "movetime" in params and not infinite else None,
+            node_limit=params.get("nodes"),
+            root_moves=root_moves,
+            callback=lambda r: self.send(format_info(r, board, time.monotonic() - start)),
+            stop_event=stop_event,
+            time_manager=None if infinite else time_manager_for(params, board.turn),
+        )
+        # UCI: in infinite/ponder mode bestmove must wait for `stop` (or `ponderhit`).
+        release_event.wait()
+        move = result.move or next(iter(board.legal_moves), None)
+        if move is None:
+            self.send("bestmove 0000")
+        elif len(result.pv) > 1:
+            self.send(f"bestmove {move.uci()} ponder {result.pv[1].uci()}")
+        else:
+            self.send(f"bestmove {move.uci()}")
+
+    def stop(self):
+        """
+        Interrupt the running search (it still prints its bestmove) and wait for it.
+        """
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.release_event.set()
+        if self.search_thread is not None:
+            self.search_thread.join()
+        if self.ponder_timer is not None:
+            self.ponder_timer.cancel()
+        self.search_thread = None
+        self.stop_event = None
+        self.release_event = None
+        self.ponder_timer = None
+        self.go_params = None
+
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line.strip()):
+            break
+    engine.stop()
+
+
+if __name__ == "__main__":
+    main()
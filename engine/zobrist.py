@@ -0,0 +1,76 @@
+import random
+import chess
+
+# Fixed seed so keys (and therefore stored tables) are reproducible between runs.
+_rng = random.Random(0x5A0B2157)
+
+# PIECE_KEYS[color][piece_type][square]; index 0 of piece_type is unused.
+PIECE_KEYS = [
+    [[_rng.getrandbits(64) for _ in chess.SQUARES] for _ in range(7)]
+    for _ in chess.COLORS
+]
+EP_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+SIDE_KEY = _rng.getrandbits(64)
+
+_CORNER_KEYS = {
+    chess.A1: _rng.getrandbits(64),
+    chess.H1: _rng.getrandbits(64),
+    chess.A8: _rng.getrandbits(64),
+    chess.H8: _rng.getrandbits(64),
+}
+CASTLING_KEYS = {}
+for _mask in range(16):
+    _rights = 0
+    _key = 0
+    for _bit, (_square, _corner_key) in enumerate(_CORNER_KEYS.items()):
+        if _mask & (1 << _bit):
+            _rights |= chess.BB_SQUARES[_square]
+            _key ^= _corner_key
+    CASTLING_KEYS[_rights] = _key
+
+
+def castling_key(castling_rights):
+    """
+    Return the key for a castling-rights bitmask (only corner rooks count).
+    """
+    return CASTLING_KEYS[castling_rights & chess.BB_CORNERS]
+
+
+def ep_key(ep_square):
+    """
+    Return the key for an en passant square, or 0 if there is none.
+    """
+    return 0 if ep_square is None else EP_KEYS[chess.square_file(ep_square)]
+
+
+def zobrist_hash(board):
+    """
+    Compute the Zobrist key of a position from scratch.
+    Used to seed incremental updates; see engine.position.Position.
+    """
+    key = 0
+    for color in chess.COLORS:
+        color_keys = PIECE_KEYS[color]
+        occupied = board.occupied_co[color]
+        for piece_type in chess.PIECE_TYPES:
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color) & occupied):
+                key ^= color_keys[piece_type][square]
+    key ^= castling_key(board.castling_rights)
+    key ^= ep_key(board.ep_square)
+    if board.turn == chess.BLACK:
+        key ^= SIDE_KEY
+    return key
+
+
+def pawn_hash(board):
+    """
+    Compute the pawn-only Zobrist key of a position: the piece keys of its
+    pawns and nothing else. Positions with the same pawns share it.
+    """
+    key = 0
+    for color in chess.COLORS:
+        pawn_keys = PIECE_KEYS[color][chess.PAWN]
+        for square in chess.scan_forward(board.pawns & board.occupied_co[color]):
+            key ^= pawn_keys[square]
+    return key
+
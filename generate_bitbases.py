@@ -0,0 +1,550 @@
+"""
+Generate win/draw/loss endgame bitbases for the search (see engine.bitbase).
+
+Usage:
+    python generate_bitbases.py                    # KQK, KRK and KPK
+    python generate_bitbases.py KQKR KRKP --workers 8
+
+Tables are named by material, the side written first playing White, and
+are written to bitbases/<name>.bb (--output to change). Tables a requested
+one depends on (through captures and promotions) are generated first;
+existing files are kept unless --force is given.
+
+Each table is built by retrograde analysis. A first pass, split between
+worker processes, finds every legal position's immediate result: mates,
+stalemates, and captures or promotions into smaller tables, which are read
+from their finished files. Results then spread backwards from the decided
+positions: a position one move from a loss for the opponent is won, and one
+whose every move leads to a win for the opponent is lost. Whatever is still
+undecided at the end is a draw.
+
+Positions are stored without en passant rights (the prober never looks
+such positions up), but a double pawn push that allows an en passant reply
+is scored with that reply: it counts as a capture into a smaller table when
+the reply wins or is the only move, and otherwise can never be better for
+the opponent than the reply's result.
+
+Three-piece tables take seconds. Four-piece tables have 5 million (without
+pawns) to 17 million positions and take a long while in Python; --workers
+only speeds up the first pass.
+
+--verify N checks N random positions of each requested table against
+python-chess: a position's stored result must follow from its legal moves
+and the stored results after them. In tables with pawns on both sides, half
+the positions have a double push that allows en passant.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import chess
+from engine.bitbase import (DEFAULT_BITBASE_DIR, DRAW, EXTENSION, LOSS, WIN, Bitbases, TableLayout,
+                            canonical_name, is_trivial_draw, split_name, table_name, write_table)
+
+DEFAULT_TABLES = ["KQK", "KRK", "KPK"]
+
+# Position states during generation.
+ILLEGAL = 0
+UNKNOWN = 1
+UNKNOWN_DRAW_EXIT = 2  # Undecided, but a capture or promotion reaches a draw.
+WON = 3
+LOST = 4
+DRAWN = 5
+
+# Positions handed to a worker process at a time in the first pass.
+CHUNK_SIZE = 1 << 16
+
+PROMOTIONS = (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+
+
+def attacks(piece_type, color, square, occupied):
+    """
+    Squares attacked by a piece on square (pawns: captures only).
+    """
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[color][square]
+    if piece_type == chess.KNIGHT:
+        return chess.BB_KNIGHT_ATTACKS[square]
+    if piece_type == chess.KING:
+        return chess.BB_KING_ATTACKS[square]
+    result = 0
+    if piece_type in (chess.BISHOP, chess.QUEEN):
+        result |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        result |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+                   | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return result
+
+
+class TableGenerator:
+    """
+    Move generation over one table's positions, given as lists of squares
+    in TableLayout order. Exits (captures and promotions) are scored with
+    the finished tables in directory.
+    """
+
+    def __init__(self, name, directory):
+        self.layout = TableLayout(name)
+        self.pieces = self.layout.pieces
+        self.bitbases = Bitbases(directory)
+
+    def occupancy(self, squares):
+        occupied = 0
+        for square in squares:
+            occupied |= chess.BB_SQUARES[square]
+        return occupied
+
+    def attacked(self, square, by_color, squares, occupied, captured=None):
+        target = chess.BB_SQUARES[square]
+        for i, (color, piece_type) in enumerate(self.pieces):
+            if color == by_color and i != captured and attacks(piece_type, color, squares[i], occupied) & target:
+                return True
+        return False
+
+    def is_legal(self, squares, turn):
+        """
+        Pieces on distinct squares, no pawn on the first or last rank, and
+        the side not to move not in check.
+        """
+        if len(set(squares)) != len(squares):
+            return False
+        for (_, piece_type), square in zip(self.pieces, squares):
+            if piece_type == chess.PAWN and chess.square_rank(square) in (0, 7):
+                return False
+        king = squares[1 if turn == chess.WHITE else 0]
+        return not self.attacked(king, turn, squares, self.occupancy(squares))
+
+    def in_check(self, squares, turn):
+        king = squares[0 if turn == chess.WHITE else 1]
+        return self.attacked(king, not turn, squares, self.occupancy(squares))
+
+    def moves(self, squares, turn, exits=True, en_passant=True):
+        """
+        Yield ("in", index) for each legal move staying in this table and
+        ("exit", result) for each capture or promotion, result being the
+        new position's value for its side to move (None when exits is off).
+        A double push the opponent can answer en passant yields ("ep",
+        index) when the reply draws: the position at index is then worth at
+        least a draw to the opponent. It is an exit with the reply's result
+        when the reply wins or is the opponent's only move, and a plain "in"
+        move when the reply loses. en_passant=False skips this analysis.
+        """
+        occupied = self.occupancy(squares)
+        own = 0
+        for (color, _), square in zip(self.pieces, squares):
+            if color == turn:
+                own |= chess.BB_SQUARES[square]
+        enemy = occupied & ~own
+        king_index = 0 if turn == chess.WHITE else 1
+
+        for i, (color, piece_type) in enumerate(self.pieces):
+            if color != turn:
+                continue
+            origin = squares[i]
+            if piece_type == chess.PAWN:
+                step = 8 if turn == chess.WHITE else -8
+                targets = chess.BB_PAWN_ATTACKS[turn][origin] & enemy
+                if not occupied & chess.BB_SQUARES[origin + step]:
+                    targets |= chess.BB_SQUARES[origin + step]
+                    start_rank = 1 if turn == chess.WHITE else 6
+                    if (chess.square_rank(origin) == start_rank
+                            and not occupied & chess.BB_SQUARES[origin + 2 * step]):
+                        targets |= chess.BB_SQUARES[origin + 2 * step]
+            else:
+                targets = attacks(piece_type, turn, origin, occupied) & ~own
+
+            for target in chess.scan_forward(targets):
+                captured = None
+                if enemy & chess.BB_SQUARES[target]:
+                    captured = squares.index(target)
+                moved = list(squares)
+                moved[i] = target
+                after = (occupied & ~chess.BB_SQUARES[origin]) | chess.BB_SQUARES[target]
+                king = moved[king_index]
+                if self.attacked(king, not turn, moved, after, captured):
+                    continue
+                promotion = piece_type == chess.PAWN and chess.square_rank(target) in (0, 7)
+                if captured is None and not promotion:
+                    reply = None
+                    if en_passant and piece_type == chess.PAWN and abs(target - origin) == 16:
+                        reply = self.en_passant_result(moved, not turn, i, origin + step)
+                    if reply is None or reply == LOSS:
+                        yield "in", self.layout.index(moved, not turn)
+                    elif reply == WIN or not self.has_moves(moved, not turn):
+                        yield "exit", reply
+                    else:
+                        yield "ep", self.layout.index(moved, not turn)
+                elif not exits:
+                    yield "exit", None
+                else:
+                    for new_type in (PROMOTIONS if promotion else (piece_type,)):
+                        pieces = [(color, new_type if j == i else kind, square)
+                                  for j, ((color, kind), square) in enumerate(zip(self.pieces, moved))
+                                  if j != captured]
+                        result = self.bitbases.probe_pieces(pieces, not turn)
+                        if result is None:
+                            raise RuntimeError(f"{self.layout.name} needs a table for {pieces}")
+                        yield "exit", result
+
+    def has_moves(self, squares, turn):
+        """
+        Whether the side to move has a legal move other than en passant.
+        """
+        for _ in self.moves(squares, turn, exits=False, en_passant=False):
+            return True
+        return False
+
+    def en_passant_result(self, squares, turn, pushed, passed):
+        """
+        Best result for turn of capturing en passant the pawn pushed (a
+        piece index) that has just passed the square passed, or None when
+        no en passant capture is legal.
+        """
+        best = None
+        king_index = 0 if turn == chess.WHITE else 1
+        occupied = self.occupancy(squares)
+        for i, (color, piece_type) in enumerate(self.pieces):
+            if (color != turn or piece_type != chess.PAWN
+                    or not chess.BB_PAWN_ATTACKS[turn][squares[i]] & chess.BB_SQUARES[passed]):
+                continue
+            moved = list(squares)
+            moved[i] = passed
+            after = ((occupied & ~chess.BB_SQUARES[squares[i]] & ~chess.BB_SQUARES[squares[pushed]])
+                     | chess.BB_SQUARES[passed])
+            if self.attacked(moved[king_index], not turn, moved, after, pushed):
+                continue
+            pieces = [(color, kind, square) for j, ((color, kind), square) in enumerate(zip(self.pieces, moved))
+                      if j != pushed]
+            result = self.bitbases.probe_pieces(pieces, not turn)
+            if result is None:
+                raise RuntimeError(f"{self.layout.name} needs a table for {pieces}")
+            best = -result if best is None else max(best, -result)
+        return best
+
+    def initial_state(self, index):
+        """
+        State of a position before any backwards propagation.
+        """
+        turn, squares = self.layout.decode(index)
+        if self.layout.index(squares, turn) != index or not self.is_legal(squares, turn):
+            return ILLEGAL
+        has_moves = False
+        in_table = 0
+        draw_exit = False
+        for kind, value in self.moves(squares, turn):
+            has_moves = True
+            if kind != "exit":
+                in_table += 1
+            elif value == LOSS:
+                return WON
+            elif value == DRAW:
+                draw_exit = True
+        if not has_moves:
+            return LOST if self.in_check(squares, turn) else DRAWN
+        if not in_table:
+            return DRAWN if draw_exit else LOST
+        return UNKNOWN_DRAW_EXIT if draw_exit else UNKNOWN
+
+    def predecessors(self, index):
+        """
+        (index, double_push) for the positions from which a move staying in
+        this table (no capture, no promotion) reaches the position at index;
+        double_push tells that move was a double pawn push, which may allow
+        en passant (see moves).
+        """
+        turn, squares = self.layout.decode(index)
+        mover = not turn
+        occupied = self.occupancy(squares)
+        for i, (color, piece_type) in enumerate(self.pieces):
+            if color != mover:
+                continue
+            square = squares[i]
+            if piece_type == chess.PAWN:
+                step = 8 if mover == chess.WHITE else -8
+                origins = 0
+                rank = chess.square_rank(square - step)
+                if 1 <= rank <= 6 and not occupied & chess.BB_SQUARES[square - step]:
+                    origins |= chess.BB_SQUARES[square - step]
+                    start_rank = 1 if mover == chess.WHITE else 6
+                    if (chess.square_rank(square - 2 * step) == start_rank
+                            and not occupied & chess.BB_SQUARES[square - 2 * step]):
+                        origins |= chess.BB_SQUARES[square - 2 * step]
+            else:
+                origins = attacks(piece_type, mover, square, occupied) & ~occupied
+            for origin in chess.scan_forward(origins):
+                previous = list(squares)
+                previous[i] = origin
+                if self.is_legal(previous, mover):
+                    yield self.layout.index(previous, mover), abs(origin - square) == 16
+
+    def settle(self, index, states):
+        """
+        WON if a move staying in the table reaches a position lost by the
+        opponent, LOST if every such move reaches one won by the opponent
+        (captures and promotions were settled in the first pass), else None.
+        """
+        turn, squares = self.layout.decode(index)
+        all_lose = True
+        for kind, child in self.moves(squares, turn, exits=False):
+            if kind == "exit":
+                continue
+            if kind == "in" and states[child] == LOST:
+                return WON
+            if states[child] != WON:
+                all_lose = False
+        return LOST if all_lose else None
+
+
+# One generator per worker process and table.
+_generators = {}
+
+
+def _initial_states(name, directory, start, stop):
+    generator = _generators.get(name)
+    if generator is None:
+        generator = _generators[name] = TableGenerator(name, directory)
+    return start, bytes(generator.initial_state(index) for index in range(start, stop))
+
+
+def dependencies(name):
+    """
+    Tables (canonical names) reached from name by one capture or promotion,
+    leaving out material that cannot win.
+    """
+    white, black = split_name(name)
+    results = set()
+    for side, other, swap in ((white, black, False), (black, white, True)):
+        reachable = [(side, other[:i] + other[i + 1:]) for i in range(len(other))]
+        for i, letter in enumerate(side):
+            if letter == "P":
+                for promoted in "QRBN":
+                    new_side = side[:i] + promoted + side[i + 1:]
+                    reachable.append((new_side, other))
+                    reachable.extend((new_side, other[:j] + other[j + 1:]) for j in range(len(other)))
+        for mine, theirs in reachable:
+            first, second = (theirs, mine) if swap else (mine, theirs)
+            if not is_trivial_draw(first, second):
+                results.add(canonical_name(table_name(first, second)))
+    return sorted(results)
+
+
+def table_path(directory, name):
+    return os.path.join(directory, name + EXTENSION)
+
+
+def generate_table(name, directory, workers=1):
+    """
+    Build one table (its dependencies must exist) and write it. Returns a
+    dict of position counts by result.
+    """
+    generator = TableGenerator(name, directory)
+    layout = generator.layout
+    states = bytearray(layout.size)
+
+    # First pass: immediate results, in parallel.
+    chunks = [(start, min(start + CHUNK_SIZE, layout.size)) for start in range(0, layout.size, CHUNK_SIZE)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_initial_states, name, directory, start, stop) for start, stop in chunks]
+            for future in futures:
+                start, chunk = future.result()
+                states[start:start + len(chunk)] = chunk
+    else:
+        for start, stop in chunks:
+            states[start:stop] = _initial_states(name, directory, start, stop)[1]
+
+    # Propagate decided results backwards, one move at a time.
+    frontier = [index for index, state in enumerate(states) if state in (WON, LOST)]
+    while frontier:
+        following = []
+        candidates = set()
+        for index in frontier:
+            lost = states[index] == LOST
+            for parent, double_push in generator.predecessors(index):
+                if states[parent] not in (UNKNOWN, UNKNOWN_DRAW_EXIT):
+                    continue
+                if lost and not double_push:
+                    states[parent] = WON
+                    following.append(parent)
+                else:
+                    # A double push may allow en passant: look at every move.
+                    candidates.add(parent)
+        for parent in candidates:
+            if states[parent] not in (UNKNOWN, UNKNOWN_DRAW_EXIT):
+                continue
+            result = generator.settle(parent, states)
+            if result == WON:
+                states[parent] = WON
+                following.append(parent)
+            elif result == LOST:
+                if states[parent] == UNKNOWN_DRAW_EXIT:
+                    states[parent] = DRAWN
+                else:
+                    states[parent] = LOST
+                    following.append(parent)
+        frontier = following
+
+    wins = bytearray((layout.size + 7) // 8)
+    losses = bytearray((layout.size + 7) // 8)
+    counts = {"won": 0, "lost": 0, "drawn": 0}
+    for index, state in enumerate(states):
+        if state == WON:
+            wins[index >> 3] |= 1 << (index & 7)
+            counts["won"] += 1
+        elif state == LOST:
+            losses[index >> 3] |= 1 << (index & 7)
+            counts["lost"] += 1
+        elif state != ILLEGAL:
+            counts["drawn"] += 1
+    write_table(table_path(directory, layout.name), layout, wins, losses)
+    return counts
+
+
+def expected_result(bitbases, board):
+    """
+    Result for the side to move worked out from its legal moves and the
+    bitbase results after them. Positions with en passant rights, which the
+    tables do not store, are searched a ply further.
+    """
+    best = None
+    for move in board.legal_moves:
+        board.push(move)
+        try:
+            if board.is_checkmate():
+                result = LOSS
+            elif board.is_stalemate() or board.is_insufficient_material():
+                result = DRAW
+            else:
+                result = bitbases.probe(board)
+                if result is None:
+                    if not board.has_legal_en_passant():
+                        raise RuntimeError(f"no bitbase for {board.fen()}")
+                    result = expected_result(bitbases, board)
+        finally:
+            board.pop()
+        best = -result if best is None else max(best, -result)
+    if best is None:
+        return LOSS if board.is_check() else DRAW
+    return best
+
+
+def random_position(layout, en_passant=False):
+    """
+    A random legal chess.Board with the table's pieces. With en_passant,
+    a pawn of the side to move stands on its start rank with an enemy pawn
+    two ranks ahead on a neighbouring file, so a double push allows an en
+    passant reply (tables with pawns on both sides only).
+    """
+    while True:
+        turn = random.choice(chess.COLORS)
+        squares = random.sample(chess.SQUARES, len(layout.pieces))
+        if en_passant:
+            own = next(i for i, piece in enumerate(layout.pieces) if piece == (turn, chess.PAWN))
+            enemy = next(i for i, piece in enumerate(layout.pieces) if piece == (not turn, chess.PAWN))
+            file = random.randrange(8)
+            enemy_file = file + random.choice([offset for offset in (-1, 1) if 0 <= file + offset < 8])
+            squares[own] = chess.square(file, 1 if turn == chess.WHITE else 6)
+            squares[enemy] = chess.square(enemy_file, 3 if turn == chess.WHITE else 4)
+            if len(set(squares)) != len(squares):
+                continue
+        board = chess.Board(None)
+        for (color, piece_type), square in zip(layout.pieces, squares):
+            board.set_piece_at(square, chess.Piece(piece_type, color))
+        board.turn = turn
+        if board.is_valid():
+            return board
+
+
+def verify_table(name, directory, samples):
+    """
+    Check samples random positions of a finished table against
+    expected_result. Returns the list of FENs that disagree.
+    """
+    layout = TableLayout(name)
+    bitbases = Bitbases(directory)
+    white, black = split_name(layout.name)
+    both_pawns = "P" in white and "P" in black
+    mismatches = []
+    try:
+        for sample in range(samples):
+            board = random_position(layout, en_passant=both_pawns and sample % 2 == 0)
+            if bitbases.probe(board) != expected_result(bitbases, board):
+                mismatches.append(board.fen())
+    finally:
+        bitbases.close()
+    return mismatches
+
+
+def generate(names, directory, workers=1, force=False):
+    """
+    Generate the named tables and everything they depend on, smallest first.
+    """
+    os.makedirs(directory, exist_ok=True)
+    done = set()
+
+    def visit(name):
+        name = canonical_name(name)
+        if name in done:
+            return
+        done.add(name)
+        for dependency in dependencies(name):
+            visit(dependency)
+        white, black = split_name(name)
+        if is_trivial_draw(white, black):
+            print(f"{name}: always drawn, no table needed")
+            return
+        if not force and os.path.exists(table_path(directory, name)):
+            print(f"{name}: exists")
+            return
+        start = time.perf_counter()
+        counts = generate_table(name, directory, workers)
+        print(f"{name}: {counts['won']} won, {counts['drawn']} drawn, {counts['lost']} lost "
+              f"(side to move) in {time.perf_counter() - start:.1f}s")
+
+    for name in names:
+        visit(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate endgame bitbases by retrograde analysis.")
+    parser.add_argument("tables", nargs="*", default=DEFAULT_TABLES,
+                        help="tables such as KQK or KRKP (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=DEFAULT_BITBASE_DIR, help="directory for the table files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="regenerate tables that already exist")
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="check N random positions of each table against python-chess")
+    args = parser.parse_args()
+
+    for name in args.tables:
+        try:
+            white, black = split_name(name)
+        except ValueError as error:
+            parser.error(str(error))
+        if 2 + len(white) + len(black) > 4:
+            parser.error(f"{name}: at most 4 pieces are supported")
+        if not white + black:
+            parser.error(f"{name}: needs at least one piece besides the kings")
+    try:
+        generate(args.tables, args.output, args.workers, args.force)
+        failed = False
+        for name in args.tables if args.verify else []:
+            name = canonical_name(name)
+            if is_trivial_draw(*split_name(name)):
+                continue
+            mismatches = verify_table(name, args.output, args.verify)
+            print(f"{name}: {args.verify} positions checked, {len(mismatches)} wrong")
+            for fen in mismatches[:10]:
+                print(f"    {fen}")
+            failed = failed or bool(mismatches)
+    except KeyboardInterrupt:
+        sys.exit("interrupted")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,30 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 import chess
+import math
 import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
 from PIL import Image, ImageTk
-from ai import find_best_move, find_random_move  # Import AI logic
+from ai import MAX_DEPTH, Ponderer, expected_reply, find_best_move, find_random_move  # Import AI logic
+from engine.clock import GameClock
+from engine.move_cache import LegalMoveCache
+from engine.time_manager import TimeManager
+
+# How often the Tk loop checks for a finished AI search (~60 fps).
+AI_POLL_MS = 16
+
+SQUARE_COLORS = ["#EEEED2", "#769656"]  # Light and dark square colors
+
+# Redraw durations kept for frame_time_summary.
+FRAME_SAMPLES = 200
+
+# Time control: base time per player, and increment added after each move (seconds).
+GAME_SECONDS = 10 * 60
+INCREMENT_SECONDS = 0
 
 class ChessGUI:
     def __init__(self, root):
@@ -17,6 +38,9 @@ class ChessGUI:
         
         self.board = chess.Board()
 
+        # Legal moves per position, shared by highlighting, validation and game-over checks
+        self.legal_moves = LegalMoveCache()
+
         self.square_size = 70  # Slightly larger squares for better visibility
         self.canvas = tk.Canvas(
             self.main_frame, 
@@ -38,9 +62,8 @@ class ChessGUI:
         
         self.turn = 'white'
         self.difficulty = 'Intermediate'  # Default difficulty level
-        self.time_left_white = 10 * 60  # 10 minutes in seconds
-        self.time_left_black = 10 * 60  # 10 minutes in seconds
-        self.timer_running = False
+        self.clock = GameClock(GAME_SECONDS, INCREMENT_SECONDS, on_flag=self.on_flag, schedule=self.schedule)
+        self.timer_refresh = None  # Tk after() id of the next clock label update
         
         # Current player indicator
         self.turn_indicator = tk.Label(
@@ -152,18 +175,29 @@ class ChessGUI:
         self.highlight_squares = []  # stores squares to highlight
         self.piece_images = {}
         self.load_piece_images()
+        self.frame_times = deque(maxlen=FRAME_SAMPLES)
+        self.create_board_items()
         self.draw_board()
         self.canvas.bind("<Button-1>", self.on_click)
 
         # Track game state
         self.game_active = True
         self.promotion_in_progress = False
+
+        # Background AI search: results arrive on the queue tagged with the
+        # stop event of the search that produced them.
+        self.ai_thinking = False
+        self.ai_stop = None
+        self.ai_results = queue.Queue()
+
+        # Searches the expected reply while the player is thinking
+        self.ponderer = Ponderer()
+
+        # Intermediate and Hard play book moves in the opening (see ai.OPENING_BOOK)
+        self.use_book = True
         
         # Start turn timer
         self.start_turn_timer()
-        
-        # Draw coordinates around the board
-        self.draw_coordinates()
 
     def load_piece_images(self):
         piece_symbols = ['r', 'n', 'b', 'q', 'k', 'p']
@@ -188,64 +222,111 @@ class ChessGUI:
             y = (7 - i) * self.square_size + self.square_size / 2
             self.canvas.create_text(x, y, text=str(i + 1), fill="#ffffff", font=('Arial', 12))
 
+    def create_board_items(self):
+        """
+        Create the canvas items once: per square a background rectangle, a
+        move marker oval and a piece image, plus the check border. draw_board
+        only reconfigures them afterwards.
+        """
+        self.square_items = {}
+        self.square_state = {}
+        for square in chess.SQUARES:
+            x1, y1, x2, y2 = self.square_bounds(square)
+            color = SQUARE_COLORS[(chess.square_file(square) + chess.square_rank(square) + 1) % 2]
+            background = self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
+            marker = self.canvas.create_oval(x1, y1, x2, y2, outline="", state="hidden")
+            image = self.canvas.create_image((x1 + x2) / 2, (y1 + y2) / 2, anchor="center", state="hidden")
+            self.square_items[square] = (background, marker, image)
+            self.square_state[square] = (color, None, None)
+        self.check_border = self.canvas.create_rectangle(0, 0, 0, 0, outline="#ff0000", width=3, state="hidden")
+        self.check_square = None
+        self.draw_coordinates()
+
+    def square_bounds(self, square):
+        x1 = chess.square_file(square) * self.square_size
+        y1 = (7 - chess.square_rank(square)) * self.square_size
+        return x1, y1, x1 + self.square_size, y1 + self.square_size
+
+    def square_look(self, square, piece):
+        """
+        What a square should show: (background color, marker, piece image key).
+        The marker is "capture", "move" or None.
+        """
+        color = SQUARE_COLORS[(chess.square_file(square) + chess.square_rank(square) + 1) % 2]
+        image_key = None
+        if piece:
+            name = piece.symbol()
+            image_key = ('w' if name.isupper() else 'b') + name.lower()
+            if image_key not in self.piece_images:
+                image_key = None
+
+        # Highlight selected square
+        if square == self.selected_square:
+            return "#f7ec54", None, image_key
+        # Highlight valid moves: red circle for captures, green for empty squares
+        if square in self.highlight_squares:
+            return color, "capture" if piece else "move", image_key
+        return color, None, image_key
+
     def draw_board(self):
-        colors = ["#EEEED2", "#769656"]  # Light and dark square colors
-        self.canvas.delete("all")
-
-        # Draw the squares
-        for row in range(8):
-            for col in range(8):
-                color = colors[(row + col) % 2]
-                x1 = col * self.square_size
-                y1 = row * self.square_size
-                x2 = x1 + self.square_size
-                y2 = y1 + self.square_size
-
-                square = chess.square(col, 7 - row)
-
-                # Highlight selected square
-                if square == self.selected_square:
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill="#f7ec54", outline="")
-                # Highlight valid moves
-                elif square in self.highlight_squares:
-                    # Use different highlight based on whether there's a piece to capture
-                    if self.board.piece_at(square):
-                        # Red circle for capture moves
-                        self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-                        self.canvas.create_oval(x1+10, y1+10, x2-10, y2-10, fill="#ff6961", outline="")
-                    else:
-                        # Green circle for empty square moves
-                        self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-                        self.canvas.create_oval(x1+20, y1+20, x2-20, y2-20, fill="#a7c7ac", outline="")
+        """
+        Bring the canvas up to date with the board, selection and highlights.
+        Only squares that look different from the last redraw are touched.
+        The time taken is recorded in self.frame_times.
+        """
+        start = time.perf_counter()
+        pieces = self.board.piece_map()
+        updated = 0
+        for square in chess.SQUARES:
+            look = self.square_look(square, pieces.get(square))
+            previous = self.square_state[square]
+            if look == previous:
+                continue
+            self.square_state[square] = look
+            updated += 1
+            background, marker, image = self.square_items[square]
+            color, marker_kind, image_key = look
+            if color != previous[0]:
+                self.canvas.itemconfig(background, fill=color)
+            if marker_kind != previous[1]:
+                if marker_kind is None:
+                    self.canvas.itemconfig(marker, state="hidden")
                 else:
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-
-                # Draw pieces
-                piece = self.board.piece_at(square)
-                if piece:
-                    name = piece.symbol()
-                    image_key = ('w' if name.isupper() else 'b') + name.lower()
-                    if image_key in self.piece_images:
-                        image_x = x1 + (self.square_size - self.piece_images[image_key].width()) / 2
-                        image_y = y1 + (self.square_size - self.piece_images[image_key].height()) / 2
-                        self.canvas.create_image(image_x, image_y, anchor="nw", image=self.piece_images[image_key])
-        
-        # Draw coordinates        
-        self.draw_coordinates()
-        
-        # Check if king is in check
-        if self.board.is_check():
-            king_color = chess.WHITE if self.board.turn == chess.WHITE else chess.BLACK
-            king_square = self.board.king(king_color)
-            col = chess.square_file(king_square)
-            row = 7 - chess.square_rank(king_square)
-            x1 = col * self.square_size
-            y1 = row * self.square_size
-            x2 = x1 + self.square_size
-            y2 = y1 + self.square_size
-            
-            # Draw red border around king in check
-            self.canvas.create_rectangle(x1, y1, x2, y2, outline="#ff0000", width=3)
+                    x1, y1, x2, y2 = self.square_bounds(square)
+                    inset = 10 if marker_kind == "capture" else 20
+                    self.canvas.coords(marker, x1 + inset, y1 + inset, x2 - inset, y2 - inset)
+                    self.canvas.itemconfig(marker, state="normal",
+                                           fill="#ff6961" if marker_kind == "capture" else "#a7c7ac")
+            if image_key != previous[2]:
+                if image_key is None:
+                    self.canvas.itemconfig(image, state="hidden")
+                else:
+                    self.canvas.itemconfig(image, image=self.piece_images[image_key], state="normal")
+
+        # Red border around the king in check
+        check_square = self.board.king(self.board.turn) if self.board.is_check() else None
+        if check_square != self.check_square:
+            self.check_square = check_square
+            updated += 1
+            if check_square is None:
+                self.canvas.itemconfig(self.check_border, state="hidden")
+            else:
+                self.canvas.coords(self.check_border, *self.square_bounds(check_square))
+                self.canvas.itemconfig(self.check_border, state="normal")
+
+        self.frame_times.append((time.perf_counter() - start, updated))
+
+    def frame_time_summary(self):
+        """
+        Mean and worst redraw time in milliseconds and the mean number of
+        squares updated, over the recent redraws.
+        """
+        if not self.frame_times:
+            return "no redraws yet"
+        times = [seconds for seconds, _ in self.frame_times]
+        updated = sum(count for _, count in self.frame_times) / len(self.frame_times)
+        return (f"{len(times)} redraws: mean {1000 * sum(times) / len(times):.2f} ms, "
+                f"max {1000 * max(times):.2f} ms, {updated:.1f} squares updated on average")
 
     def set_difficulty(self, difficulty):
         """
@@ -253,16 +334,33 @@ class ChessGUI:
         """
         self.difficulty = difficulty
 
-    def get_ai_move(self):
+    def ai_search_limits(self):
         """
-        Get the AI's move based on the selected difficulty level.
+        Search depth cap and TimeManager (budgeted from Black's clock) for the
+        selected difficulty level, or None when the AI plays random moves.
+        Intermediate stays shallow; Hard searches as deep as its clock allows.
         """
-        if self.difficulty == 'Basic':
-            return find_random_move(self.board)
-        elif self.difficulty == 'Intermediate':
-            return find_best_move(self.board, depth=2)
+        time_manager = TimeManager.from_clock(self.clock, chess.BLACK)
+        if self.difficulty == 'Intermediate':
+            return 2, time_manager
         elif self.difficulty == 'Hard':
-            return find_best_move(self.board, depth=4)
+            return MAX_DEPTH, time_manager
+        return None
+
+    def get_ai_move(self, board=None, stop_event=None):
+        """
+        Get the AI's move based on the selected difficulty level.
+        Searches board (default: the game board); setting stop_event cancels the search.
+        """
+        if board is None:
+            board = self.board
+        limits = self.ai_search_limits()
+        if limits is None:
+            return find_random_move(board)
+        depth, time_manager = limits
+        # find_best_move plays straight from the opening book while the game is in it.
+        return find_best_move(board, depth=depth, stop_event=stop_event, use_book=self.use_book,
+                              time_manager=time_manager)
 
     def handle_pawn_promotion(self, move):
         """
@@ -371,7 +469,7 @@ class ChessGUI:
         return (piece.color == chess.WHITE and rank == 7) or (piece.color == chess.BLACK and rank == 0)
 
     def on_click(self, event):
-        if not self.game_active or self.promotion_in_progress:
+        if not self.game_active or self.promotion_in_progress or self.ai_thinking:
             return
             
         col = event.x // self.square_size
@@ -390,21 +488,21 @@ class ChessGUI:
                 self.selected_square = square
                 
                 # Highlight legal moves for selected piece
-                self.highlight_squares = [move.to_square for move in self.board.legal_moves 
-                                         if move.from_square == square]
+                self.highlight_squares = [move.to_square for move in self.legal_moves.moves_from(self.board, square)]
         else:
             # Try to make a move
             move = chess.Move(self.selected_square, square)
             
-            # Check if it's a promotion move
-            if self.is_pawn_promotion(move):
+            # Check if it's a promotion move (any promotion piece is legal if the queen is)
+            if self.is_pawn_promotion(move) and self.legal_moves.is_legal(
+                    self.board, chess.Move(move.from_square, move.to_square, promotion=chess.QUEEN)):
                 self.handle_pawn_promotion(move)
                 self.selected_square = None
                 self.highlight_squares = []
                 return
                 
             # Regular move
-            if move in self.board.legal_moves:
+            if self.legal_moves.is_legal(self.board, move):
                 self.board.push(move)
                 self.check_game_over()  # Check if the game is over after the player's move
                 
@@ -421,13 +519,77 @@ class ChessGUI:
         self.draw_board()
 
     def make_ai_move(self):
-        """Make AI move and handle promotions automatically."""
-        best_move = self.get_ai_move()
-        if best_move:
-            self.board.push(best_move)
+        """
+        Start the AI search in a background thread so the Tk loop (redraws and
+        clocks) keeps running. The move is applied by poll_ai_move.
+        If the player made the move the AI was pondering on, the ponder search
+        is finished instead of starting a new one.
+        """
+        if self.ai_stop is not None:
+            self.ai_stop.set()
+        self.ai_stop = threading.Event()
+        self.ai_thinking = True
+
+        limits = self.ai_search_limits()
+        if limits is not None and self.board.move_stack and self.ponderer.hit(self.board.peek(), limits[1].soft):
+            target, args = self.finish_ponder_move, (self.ai_stop,)
+        else:
+            self.ponderer.stop()
+            target, args = self.search_ai_move, (self.board.copy(), self.ai_stop)
+        worker = threading.Thread(target=target, args=args, daemon=True)
+        worker.start()
+        self.root.after(AI_POLL_MS, self.poll_ai_move)
+
+    def finish_ponder_move(self, stop_event):
+        """Worker thread: wait for the ponder search after a ponder-hit and queue its move."""
+        self.ai_results.put((stop_event, self.ponderer.wait()))
+
+    def search_ai_move(self, board, stop_event):
+        """Worker thread: search a copy of the board and queue the result."""
+        best_move = self.get_ai_move(board, stop_event)
+        self.ai_results.put((stop_event, best_move))
+
+    def poll_ai_move(self):
+        """Apply the AI's move once the worker has queued it; otherwise check again later."""
+        try:
+            stop_event, best_move = self.ai_results.get_nowait()
+        except queue.Empty:
+            if self.ai_thinking:
+                self.root.after(AI_POLL_MS, self.poll_ai_move)
+            return
+
+        if stop_event is not self.ai_stop or stop_event.is_set():
+            # Result of a cancelled search; keep waiting for the current one.
+            if self.ai_thinking:
+                self.root.after(AI_POLL_MS, self.poll_ai_move)
+            return
+
+        self.ai_thinking = False
+        self.ai_stop = None
+        if best_move and self.game_active:
+            self.board.push(best_move)  # AI promotions come back as queen moves already
             self.check_game_over()  # Check if the game is over after the AI's move
             if self.game_active:
                 self.switch_turn()
+                self.start_pondering()
+        self.draw_board()
+
+    def start_pondering(self):
+        """Search the player's most likely reply while they think."""
+        limits = self.ai_search_limits()
+        if limits is None:
+            return
+        reply = expected_reply(self.board)
+        if reply is not None:
+            self.ponderer.start(self.board, reply, max_depth=limits[0])
+
+    def cancel_ai_move(self):
+        """Stop a running AI search or ponder search and drop its result."""
+        if self.ai_stop is not None:
+            self.ai_stop.set()
+        self.ai_stop = None
+        self.ai_thinking = False
+        self.ponderer.stop()
 
     def switch_turn(self):
         """Switch turn and update UI."""
@@ -437,67 +599,64 @@ class ChessGUI:
         # Update turn indicator
         self.turn_indicator.config(text=f"Current Player: {'Black' if self.turn == 'black' else 'White'}")
         
-        self.start_turn_timer()
+        self.clock.press()
+        self.update_timer()
 
     def start_turn_timer(self):
         """
-        Start the timer for the current player's turn.
-        Ensure the timer is not restarted unnecessarily.
+        Run the clock of the player whose turn it is and keep the labels updated.
         """
-        if not self.timer_running:  # Prevent multiple timers from running
-            self.timer_running = True
-            self.update_timer()
+        self.clock.start(chess.WHITE if self.turn == 'white' else chess.BLACK)
+        self.update_timer()
+
+    def schedule(self, seconds, callback):
+        """Scheduler for the game clock's deadline: runs callback on the Tk thread."""
+        after_id = self.root.after(max(1, math.ceil(seconds * 1000)), callback)
+        return lambda: self.root.after_cancel(after_id)
+
+    def on_flag(self, color):
+        """Called by the game clock when a player's time runs out."""
+        if self.game_active:
+            self.end_game("Black" if color == chess.WHITE else "White")
 
     def update_timer(self):
         """
-        Update the timer every second for the active player.
+        Show both players' remaining time. The clock computes it on demand, so
+        this only decides when the display next changes (the next whole
+        second of the running clock); timeouts are detected by the clock.
         """
-        if self.timer_running and self.game_active:
-            if self.turn == 'white':
-                self.time_left_white -= 1
-                minutes, seconds = divmod(self.time_left_white, 60)
-                self.white_timer_label.config(text=f"White's Time: {minutes}:{seconds:02d}")
-                
-                # Change color if time is running low
-                if self.time_left_white < 60:  # Less than a minute
-                    self.white_timer_label.config(fg="#ff6961")
-                elif self.time_left_white < 300:  # Less than 5 minutes
-                    self.white_timer_label.config(fg="#ffb347")
-                else:
-                    self.white_timer_label.config(fg="#ffffff")
-            else:
-                self.time_left_black -= 1
-                minutes, seconds = divmod(self.time_left_black, 60)
-                self.black_timer_label.config(text=f"Black's Time: {minutes}:{seconds:02d}")
-                
-                # Change color if time is running low
-                if self.time_left_black < 60:  # Less than a minute
-                    self.black_timer_label.config(fg="#ff6961")
-                elif self.time_left_black < 300:  # Less than 5 minutes
-                    self.black_timer_label.config(fg="#ffb347")
-                else:
-                    self.black_timer_label.config(fg="#ffffff")
-
-            # Check if either timer has run out
-            if self.time_left_white <= 0:
-                self.timer_running = False
-                self.end_game("Black")
-            elif self.time_left_black <= 0:
-                self.timer_running = False
-                self.end_game("White")
+        if self.timer_refresh is not None:
+            self.root.after_cancel(self.timer_refresh)
+            self.timer_refresh = None
+
+        for color, label, name in ((chess.WHITE, self.white_timer_label, "White"),
+                                   (chess.BLACK, self.black_timer_label, "Black")):
+            remaining = self.clock.remaining(color)
+            minutes, seconds = divmod(math.ceil(remaining), 60)
+            label.config(text=f"{name}'s Time: {minutes}:{seconds:02d}")
+
+            # Change color if time is running low
+            if remaining < 60:  # Less than a minute
+                label.config(fg="#ff6961")
+            elif remaining < 300:  # Less than 5 minutes
+                label.config(fg="#ffb347")
             else:
-                # Schedule the next timer update after 1 second
-                self.root.after(1000, self.update_timer)
+                label.config(fg="#ffffff")
+
+        if self.game_active and self.clock.running is not None:
+            fraction = self.clock.remaining(self.clock.running) % 1
+            self.timer_refresh = self.root.after(max(10, math.ceil(fraction * 1000)), self.update_timer)
 
     def check_game_over(self):
         """
         Check if the game is over due to checkmate, stalemate, or other conditions.
         """
-        if self.board.is_checkmate():
-            winner = "White" if self.board.turn == chess.BLACK else "Black"
-            self.end_game(winner, "Checkmate")
-        elif self.board.is_stalemate():
-            self.end_game(None, "Stalemate")
+        if not self.legal_moves.has_legal_moves(self.board):
+            if self.board.is_check():
+                winner = "White" if self.board.turn == chess.BLACK else "Black"
+                self.end_game(winner, "Checkmate")
+            else:
+                self.end_game(None, "Stalemate")
         elif self.board.is_insufficient_material():
             self.end_game(None, "Insufficient Material")
         elif self.board.is_seventyfive_moves():
@@ -510,7 +669,8 @@ class ChessGUI:
         End the game and show a message.
         """
         self.game_active = False
-        self.timer_running = False
+        self.clock.stop()
+        self.ponderer.stop()
         
         if winner:
             message = f"{winner} wins due to {reason}!"
@@ -585,17 +745,16 @@ class ChessGUI:
         """
         Start a new game.
         """
+        self.cancel_ai_move()
         self.board = chess.Board()
-        self.time_left_white = 10 * 60
-        self.time_left_black = 10 * 60
+        self.legal_moves.clear()
+        self.clock.reset()
         self.turn = 'white'
         self.game_active = True
         self.selected_square = None
         self.highlight_squares = []
         
         # Update UI
-        self.white_timer_label.config(text="White's Time: 10:00", fg="#ffffff")
-        self.black_timer_label.config(text="Black's Time: 10:00", fg="#ffffff")
         self.turn_indicator.config(text="Current Player: White")
         
         # Draw the board
@@ -610,7 +769,20 @@ class ChessGUI:
         """
         if not self.game_active:
             return
+
+        # The AI is still thinking about the player's last move: cancel it and undo that move
+        if self.ai_thinking:
+            self.cancel_ai_move()
+            self.board.pop()
+            self.turn = 'white'
+            self.turn_indicator.config(text="Current Player: White")
+            self.start_turn_timer()
+            self.draw_board()
+            return
             
+        # The position being pondered is about to disappear
+        self.cancel_ai_move()
+
         # Undo player move and AI move
         if len(self.board.move_stack) >= 2:
             self.board.pop()  # Undo AI move
@@ -622,10 +794,13 @@ class ChessGUI:
             self.draw_board()
             self.turn = 'white'
             self.turn_indicator.config(text="Current Player: White")
+            self.start_turn_timer()
 
 
 # To test this directly
 if __name__ == "__main__":
     root = tk.Tk()
     gui = ChessGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    if "--frame-times" in sys.argv:
+        print(gui.frame_time_summary())
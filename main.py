@@ -1,9 +1,10 @@
 import pygame
-import time
 import sys
+import chess
 from tkinter import Tk
 from board import create_initial_board
 from board import move_piece
+from engine.clock import GameClock
 from gui import ChessGUI
 
 # Constants
@@ -12,6 +13,9 @@ ROWS, COLS = 8, 8
 SQUARE_SIZE = WIDTH // COLS
 IMAGES = {}
 
+# Posted by the clock's on_flag callback (from its timer thread) when a side runs out of time
+TIME_UP = pygame.USEREVENT + 1
+
 # Images for pieces
 def load_images():
     pieces = ['wP', 'wR', 'wN', 'wB', 'wQ', 'wK',
@@ -50,43 +54,41 @@ def main():
     is_white_turn = True
     running = True
 
-    # Timer setup
-    white_time = 10 * 60  # 10 minutes in seconds
-    black_time = 10 * 60  # 10 minutes in seconds
-    turn_start_time = time.time()  # Track the start time of the current turn
+    # Timer setup: 10 minutes each, White's clock runs first. The clock
+    # reports running out of time itself, so the loop never polls for it.
+    def on_flag(color):
+        pygame.event.post(pygame.event.Event(TIME_UP, color=color))
+
+    game_clock = GameClock(10 * 60, on_flag=on_flag)
+    game_clock.start(chess.WHITE)
+    caption = None
 
     while running:
         draw_board(win, board)
         pygame.display.flip()
         clock.tick(60)
 
-        # Update the timer for the current player
-        current_time = time.time()
-        elapsed_time = current_time - turn_start_time
-        if is_white_turn:
-            white_time -= elapsed_time
-        else:
-            black_time -= elapsed_time
-        turn_start_time = current_time  # Reset the turn start time
-
-        # Display remaining time
-        print(f"White's remaining time: {int(white_time // 60)}:{int(white_time % 60):02d}")
-        print(f"Black's remaining time: {int(black_time // 60)}:{int(black_time % 60):02d}")
-
-        # Check if time is up
-        if white_time <= 0:
-            print("White's time is up! Black wins!")
-            running = False
-            break
-        if black_time <= 0:
-            print("Black's time is up! White wins!")
-            running = False
-            break
+        # Show the remaining time in the window title, updated when a second ticks over
+        white_time = int(game_clock.remaining(chess.WHITE))
+        black_time = int(game_clock.remaining(chess.BLACK))
+        text = (f"Chess Game - White {white_time // 60}:{white_time % 60:02d}"
+                f"  Black {black_time // 60}:{black_time % 60:02d}")
+        if text != caption:
+            caption = text
+            pygame.display.set_caption(caption)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type == TIME_UP:
+                if event.color == chess.WHITE:
+                    print("White's time is up! Black wins!")
+                else:
+                    print("Black's time is up! White wins!")
+                running = False
+                break
+
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 row, col = get_square_under_mouse(pos)
@@ -99,17 +101,16 @@ def main():
 
                     piece = board[start_row][start_col]
 
-                    # Check if the move is valid
-                    if move_piece(board, start_row, start_col, end_row, end_col, piece, is_white_turn):
-                        # Perform the move if valid
-                        board[start_row][start_col] = '--'
-                        board[end_row][end_col] = piece
-
+                    # Play the move on the board if it is valid
+                    _, moved, _ = move_piece(board, start_row, start_col, end_row, end_col, piece, is_white_turn)
+                    if moved:
                         # Switch turn after a valid move
                         is_white_turn = not is_white_turn
+                        game_clock.press()
 
                     selected_square = None  # Reset after move
 
+    game_clock.stop()
     pygame.quit()
     sys.exit()
 
@@ -121,4 +122,4 @@ def run_chess_game():
 if __name__ == "__main__":
     root = Tk()
     gui = ChessGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
\ No newline at end of file
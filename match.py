@@ -0,0 +1,299 @@
+"""
+Self-play match between two engine configurations, to tell whether a change
+made the engine stronger and not just slower.
+
+Usage:
+    python match.py hard "depth=4,null_move=off" --games 40
+    python match.py "depth=3,time=0.5" "depth=3,time=0.5,lmr=off" --openings book.epd --workers 8
+
+An engine is a preset (easy, intermediate, hard: the GUI's difficulty levels)
+and/or comma-separated settings: depth, time (seconds per move), and the
+SearchOptions switches move_ordering, null_move, lmr, futility, bitbases (on/off).
+
+Every opening is played twice with colours swapped, games run in parallel
+processes, and each engine gets its own transposition table per game. The
+report gives wins/draws/losses for the first engine, the Elo difference with
+a 95% confidence interval, and nodes per second and time per move for both.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import chess
+import chess.pgn
+import ai
+from analyze import iter_epd_positions
+from engine.transposition import TranspositionTable
+
+# Fixed-depth stand-ins for the GUI's difficulty levels, so matches are
+# reproducible (the GUI's hard level searches on its clock instead); easy
+# plays random moves.
+PRESETS = {
+    "easy": {"random": True},
+    "intermediate": {"depth": 2},
+    "hard": {"depth": 4},
+}
+
+OPTION_NAMES = {
+    "move_ordering": "move_ordering",
+    "null_move": "null_move",
+    "lmr": "late_move_reductions",
+    "futility": "futility",
+    "bitbases": "bitbases",
+}
+
+# A few plies into common openings, so games do not all repeat one line.
+DEFAULT_OPENINGS = [
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2",
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pppp1ppp/4p3/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pp1ppppp/2p5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq - 0 2",
+    "rnbqkb1r/pppppppp/5n2/8/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 1 2",
+    "rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq - 0 1",
+    "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+]
+
+# Games still running after this many plies are scored as draws.
+MAX_PLIES = 300
+
+
+def parse_engine(spec):
+    """
+    Parse an engine spec such as "hard" or "depth=5,time=1,lmr=off" into a
+    config dict with keys random, depth, time and options (SearchOptions kwargs).
+    """
+    config = {"name": spec, "random": False, "depth": ai.MAX_DEPTH, "time": None, "options": {}}
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        if part in PRESETS:
+            config.update(PRESETS[part])
+            continue
+        key, _, value = part.partition("=")
+        if key == "depth":
+            config["depth"] = int(value)
+        elif key == "time":
+            config["time"] = float(value)
+        elif key in OPTION_NAMES:
+            if value not in ("on", "off"):
+                raise ValueError(f"{key} must be on or off, not {value!r}")
+            config["options"][OPTION_NAMES[key]] = value == "on"
+        else:
+            raise ValueError(f"unknown engine setting {part!r}")
+    if not config["random"] and config["depth"] == ai.MAX_DEPTH and config["time"] is None:
+        raise ValueError(f"engine {spec!r} needs a depth or a time limit")
+    return config
+
+
+def play_game(game_index, opening, white, black, seed=0):
+    """
+    Worker entry point: play one game from the opening FEN between two engine
+    configs. Returns a dict with the result, termination, PGN and per-colour
+    move statistics.
+    """
+    board = chess.Board(opening)
+    rng = random.Random(seed + game_index)
+    engines = {chess.WHITE: white, chess.BLACK: black}
+    tables = {chess.WHITE: TranspositionTable(ai.DEFAULT_HASH_MB), chess.BLACK: TranspositionTable(ai.DEFAULT_HASH_MB)}
+    stats = {color: {"moves": 0, "nodes": 0, "seconds": 0.0, "depth": 0} for color in chess.COLORS}
+
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_PLIES:
+        config = engines[board.turn]
+        start = time.perf_counter()
+        if config["random"]:
+            move = rng.choice(list(board.legal_moves))
+            nodes = depth = 0
+        else:
+            result = ai.iterative_deepening(board, config["depth"], config["time"], tt=tables[board.turn],
+                                            options=ai.SearchOptions(**config["options"]))
+            move, nodes, depth = result.move, result.nodes, result.depth
+        side = stats[board.turn]
+        side["seconds"] += time.perf_counter() - start
+        side["moves"] += 1
+        side["nodes"] += nodes
+        side["depth"] += depth
+        board.push(move)
+
+    outcome = board.outcome(claim_draw=True)
+    result = outcome.result() if outcome else "1/2-1/2"
+    termination = outcome.termination.name.lower() if outcome else "move_limit"
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "match.py"
+    game.headers["Round"] = str(game_index + 1)
+    game.headers["White"] = white["name"]
+    game.headers["Black"] = black["name"]
+    game.headers["Result"] = result
+    game.headers["Termination"] = termination
+    return {
+        "game": game_index,
+        "opening": opening,
+        "result": result,
+        "termination": termination,
+        "plies": board.ply(),
+        "white": stats[chess.WHITE],
+        "black": stats[chess.BLACK],
+        "pgn": str(game),
+    }
+
+
+def load_openings(path):
+    """
+    Start positions from an EPD file, or the final position of every game in
+    a PGN file (so openings can be given as move lists).
+    """
+    if not path.lower().endswith(".pgn"):
+        return [fen for _, fen in iter_epd_positions(path)]
+    openings = []
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                break
+            openings.append(game.end().board().fen())
+    return openings
+
+
+def elo_difference(wins, draws, losses):
+    """
+    Elo difference implied by a match score, with the half-width of its 95%
+    confidence interval. Either value is infinite when the score is 0% or 100%;
+    the interval is also infinite when every game had the same result (all
+    draws, say), since there is then no spread to estimate it from.
+    """
+    games = wins + draws + losses
+    if not games:
+        return 0.0, math.inf
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+
+    def to_elo(p):
+        if p <= 0:
+            return -math.inf
+        if p >= 1:
+            return math.inf
+        return 400 * math.log10(p / (1 - p))
+
+    if not variance:
+        return to_elo(score), math.inf
+    margin = 1.96 * math.sqrt(variance / games)
+    low, high = to_elo(score - margin), to_elo(score + margin)
+    return to_elo(score), (high - low) / 2
+
+
+def run_match(first, second, openings, workers, seed=0, on_game=None):
+    """
+    Play every opening twice (first engine as White, then as Black) in
+    parallel. on_game, if given, is called with each finished game record
+    and the first engine's colour. Returns the list of (record, first_color).
+    """
+    games = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for index, opening in enumerate(openings):
+            for swap in (False, True):
+                game_index = 2 * index + swap
+                white, black = (second, first) if swap else (first, second)
+                future = pool.submit(play_game, game_index, opening, white, black, seed)
+                futures[future] = chess.BLACK if swap else chess.WHITE
+        for future in as_completed(futures):
+            record = future.result()
+            games.append((record, futures[future]))
+            if on_game is not None:
+                on_game(record, futures[future])
+    games.sort(key=lambda game: game[0]["game"])
+    return games
+
+
+def summarize(games):
+    """
+    Tally the first engine's results and both engines' speed.
+    """
+    wins = draws = losses = 0
+    speed = [{"moves": 0, "nodes": 0, "seconds": 0.0, "depth": 0} for _ in range(2)]
+    for record, first_color in games:
+        if record["result"] == "1/2-1/2":
+            draws += 1
+        elif (record["result"] == "1-0") == (first_color == chess.WHITE):
+            wins += 1
+        else:
+            losses += 1
+        first, second = ("white", "black") if first_color == chess.WHITE else ("black", "white")
+        for totals, side in zip(speed, (record[first], record[second])):
+            for key in totals:
+                totals[key] += side[key]
+    return wins, draws, losses, speed
+
+
+def print_report(first, second, games):
+    wins, draws, losses, speed = summarize(games)
+    total = wins + draws + losses
+    elo, margin = elo_difference(wins, draws, losses)
+    print(f"== {first['name']} vs {second['name']}: {total} games")
+    print(f"+{wins} ={draws} -{losses}  score {100 * (wins + draws / 2) / total:.1f}%  "
+          f"Elo {elo:+.0f} +/- {margin:.0f} (95%)")
+    print(f"{'engine':30} {'moves':>6} {'nps':>8} {'ms/move':>8} {'depth':>6}")
+    for config, totals in zip((first, second), speed):
+        moves = totals["moves"] or 1
+        nps = totals["nodes"] / totals["seconds"] if totals["seconds"] else 0.0
+        print(f"{config['name'][:30]:30} {totals['moves']:>6} {nps:>8.0f} "
+              f"{1000 * totals['seconds'] / moves:>8.1f} {totals['depth'] / moves:>6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play match between two engine configurations.")
+    parser.add_argument("first", help='engine spec, e.g. "hard" or "depth=4,time=0.5,lmr=off"')
+    parser.add_argument("second", help="engine spec for the opponent")
+    parser.add_argument("--games", type=int, help="number of games, rounded up to even (default: two per opening)")
+    parser.add_argument("--openings", help="EPD file of start positions, or PGN (final position of each game)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0, help="seed for random (easy) movers")
+    parser.add_argument("--output", help="append one JSON line per game to this file")
+    parser.add_argument("--pgn", help="write the games to this PGN file")
+    args = parser.parse_args()
+
+    try:
+        first, second = parse_engine(args.first), parse_engine(args.second)
+    except ValueError as error:
+        parser.error(str(error))
+
+    openings = load_openings(args.openings) if args.openings else DEFAULT_OPENINGS
+    if not openings:
+        parser.error(f"no positions in {args.openings}")
+    if args.games:
+        # Cycle through the openings; each one is played with both colours.
+        pairs = (args.games + 1) // 2
+        openings = [openings[i % len(openings)] for i in range(pairs)]
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else None
+
+    def on_game(record, first_color):
+        first_result = record["result"]
+        if first_color == chess.BLACK and first_result != "1/2-1/2":
+            first_result = first_result[::-1]
+        print(f"game {record['game'] + 1}: {first_result} ({record['termination']}, {record['plies']} plies)")
+        if output is not None:
+            line = dict(record, first=first["name"], second=second["name"],
+                        first_color="white" if first_color == chess.WHITE else "black")
+            del line["pgn"]
+            output.write(json.dumps(line) + "\n")
+            output.flush()
+
+    try:
+        games = run_match(first, second, openings, args.workers, args.seed, on_game)
+    finally:
+        if output is not None:
+            output.close()
+
+    if args.pgn:
+        with open(args.pgn, "w", encoding="utf-8") as handle:
+            for record, _ in games:
+                handle.write(record["pgn"] + "\n\n")
+    print_report(first, second, games)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Perft: count leaf nodes of the legal move tree to a fixed depth.
+
+Checks both move generators against known counts and reports their speed:
+- "chess": python-chess, as used by ai.py, against the published perft numbers.
+- "board"/"scan": board.get_legal_moves (bitboards) and board.get_legal_moves_by_scan,
+  against python-chess restricted to board.py's rules (no castling, no en passant,
+  queen promotions only), since board.py does not implement the full rules.
+
+Usage:
+    python perft.py                      # every reference position, depth 3, all generators
+    python perft.py --depth 4 --position 2 --generator chess
+    python perft.py --fen "<fen>" --depth 3 --divide
+"""
+
+import argparse
+import sys
+import time
+import chess
+import board as board_rules
+
+# (name, fen, [nodes at depth 1, 2, ...]) from the chessprogramming.org perft results.
+REFERENCE_POSITIONS = [
+    ("start", chess.STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft_chess(board, depth):
+    """
+    Count leaf nodes with python-chess under the full rules.
+    """
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft_chess(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def board_rule_moves(board):
+    """
+    python-chess legal moves restricted to what board.py can express.
+    """
+    return [move for move in board.legal_moves
+            if not board.is_castling(move) and not board.is_en_passant(move)
+            and move.promotion in (None, chess.QUEEN)]
+
+
+def perft_chess_board_rules(board, depth):
+    """
+    Count leaf nodes with python-chess restricted to board.py's rules.
+    """
+    if depth == 0:
+        return 1
+    moves = board_rule_moves(board)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft_chess_board_rules(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def perft_board(board, is_white_turn, depth, generate=board_rules.get_legal_moves):
+    """
+    Count leaf nodes for an 8x8 board.py board, using make_move/unmake_move.
+    """
+    if depth == 0:
+        return 1
+    moves = generate(board, is_white_turn)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo = board_rules.make_move(board, *move)
+        nodes += perft_board(board, not is_white_turn, depth - 1, generate)
+        board_rules.unmake_move(board, undo)
+    return nodes
+
+
+def fen_to_board(fen):
+    """
+    Convert a FEN into (8x8 board.py board, is_white_turn).
+    """
+    placement, turn = fen.split()[:2]
+    board = []
+    for rank in placement.split('/'):
+        row = []
+        for char in rank:
+            if char.isdigit():
+                row.extend(['--'] * int(char))
+            else:
+                row.append(('w' if char.isupper() else 'b') + char.upper())
+        board.append(row)
+    return board, turn == 'w'
+
+
+def tuple_to_uci(move):
+    start_row, start_col, end_row, end_col = move
+    return (chr(97 + start_col) + str(8 - start_row) +
+            chr(97 + end_col) + str(8 - end_row))
+
+
+def divide_chess(fen, depth, board_rules_only=False):
+    board = chess.Board(fen)
+    moves = board_rule_moves(board) if board_rules_only else list(board.legal_moves)
+    counter = perft_chess_board_rules if board_rules_only else perft_chess
+    result = {}
+    for move in moves:
+        board.push(move)
+        # board.py has a single move per promotion, so report it without the suffix.
+        key = move.uci()[:4] if board_rules_only else move.uci()
+        result[key] = counter(board, depth - 1)
+        board.pop()
+    return result
+
+
+def divide_board(fen, depth, generate=board_rules.get_legal_moves):
+    board, is_white_turn = fen_to_board(fen)
+    result = {}
+    for move in generate(board, is_white_turn):
+        undo = board_rules.make_move(board, *move)
+        result[tuple_to_uci(move)] = perft_board(board, not is_white_turn, depth - 1, generate)
+        board_rules.unmake_move(board, undo)
+    return result
+
+
+GENERATORS = {
+    "board": board_rules.get_legal_moves,
+    "scan": board_rules.get_legal_moves_by_scan,
+}
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    nodes = function(*args)
+    return nodes, time.perf_counter() - start
+
+
+def run_position(name, fen, expected, depth, generators):
+    """
+    Run perft for one position with each generator. Returns True if all counts match.
+    """
+    ok = True
+    rule_subset_nodes = None
+    for generator in generators:
+        if generator == "chess":
+            nodes, seconds = timed(perft_chess, chess.Board(fen), depth)
+            want = expected[depth - 1] if depth <= len(expected) else None
+        else:
+            if rule_subset_nodes is None:
+                rule_subset_nodes = perft_chess_board_rules(chess.Board(fen), depth)
+            board, is_white_turn = fen_to_board(fen)
+            nodes, seconds = timed(perft_board, board, is_white_turn, depth, GENERATORS[generator])
+            want = rule_subset_nodes
+
+        status = "?" if want is None else ("ok" if nodes == want else f"FAIL (expected {want})")
+        ok = ok and (want is None or nodes == want)
+        nps = nodes / seconds if seconds else 0.0
+        print(f"{name:12} {generator:6} depth {depth}: {nodes:>10} nodes "
+              f"{seconds:8.2f}s {nps:>10.0f} nps  {status}")
+    return ok
+
+
+def run_divide(fen, depth, generator):
+    if generator == "chess":
+        counts = divide_chess(fen, depth)
+        reference = None
+    else:
+        counts = divide_board(fen, depth, GENERATORS[generator])
+        reference = divide_chess(fen, depth, board_rules_only=True)
+
+    ok = True
+    for move in sorted(set(counts) | set(reference or {})):
+        line = f"{move}: {counts.get(move, '-')}"
+        if reference is not None and counts.get(move) != reference.get(move):
+            line += f"  (expected {reference.get(move, '-')})"
+            ok = False
+        print(line)
+    print(f"total: {sum(counts.values())}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft benchmark and move generator check.")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--position", type=int, help="1-based index into the reference positions")
+    parser.add_argument("--fen", help="run on this FEN instead of the reference positions")
+    parser.add_argument("--generator", choices=["chess", "board", "scan", "all"], default="all")
+    parser.add_argument("--divide", action="store_true", help="print node counts per root move")
+    args = parser.parse_args()
+
+    if args.generator == "all":
+        # The scan generator is orders of magnitude slower; ask for it explicitly.
+        generators = ["chess", "board"]
+    else:
+        generators = [args.generator]
+
+    if args.fen:
+        positions = [("fen", args.fen, [])]
+    elif args.position:
+        positions = [REFERENCE_POSITIONS[args.position - 1]]
+    else:
+        positions = REFERENCE_POSITIONS
+
+    ok = True
+    for name, fen, expected in positions:
+        if args.divide:
+            for generator in generators:
+                print(f"== {name} {generator}")
+                ok = run_divide(fen, args.depth, generator) and ok
+        else:
+            ok = run_position(name, fen, expected, args.depth, generators) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()